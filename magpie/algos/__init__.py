@@ -4,6 +4,7 @@ from .genetic_programming import (
     GeneticProgramming1Point,
     GeneticProgramming2Point,
     GeneticProgrammingConcat,
+    GeneticProgrammingSteadyState,
     GeneticProgrammingUniformConcat,
     GeneticProgrammingUniformInter,
 )
@@ -18,4 +19,4 @@ from .local_search import (
     TabuSearch,
     WorstImprovement,
 )
-from .validation import ValidMinify, ValidSearch, ValidSingle, ValidTest
+from .validation import ValidMinify, ValidMinifyDD, ValidSearch, ValidSingle, ValidTest
@@ -1,3 +1,4 @@
+import concurrent.futures
 import copy
 import math
 import random
@@ -48,25 +49,16 @@ class GeneticProgramming(magpie.core.BasicAlgorithm):
         try:
             # warmup
             self.hook_warmup()
+            if self.resume_file:
+                state = self.resume()
+            else:
+                # initial grow first to avoid wasting warmup
+                offsprings = self.initial_offsprings()
+                if self.report['stop']:
+                    return
 
-            # initial grow first to avoid wasting warmup
-            offsprings = []
-            tries = magpie.settings.edit_retries
-            expected = self.config['pop_size']
-            while tries and len(offsprings) < expected:
-                sol = magpie.core.Patch()
-                self.mutate(sol)
-                if sol in offsprings:
-                    tries -= 1
-                    continue
-                offsprings.append(sol)
-            got = len(offsprings)
-            if got < expected:
-                self.report['stop'] = f'unable to fill initial population ({got} unique edits generated < {expected})'
-                return
-
-            # actual warmup
-            self.warmup()
+                # actual warmup
+                self.warmup()
 
             # early stop if something went wrong during warmup
             if self.report['stop']:
@@ -77,25 +69,14 @@ class GeneticProgramming(magpie.core.BasicAlgorithm):
 
             # initial pop
             pop = {}
-            local_best_fitness = None
-            for sol in offsprings:
-                variant = magpie.core.Variant(self.software, sol)
-                run = self.evaluate_variant(variant)
-                accept = best = False
-                if run.status == 'SUCCESS':
-                    if self.dominates(run.fitness, local_best_fitness):
-                        local_best_fitness = run.fitness
-                        accept = True
-                        if self.dominates(run.fitness, self.report['best_fitness']):
-                            self.report['best_fitness'] = run.fitness
-                            self.report['best_patch'] = sol
-                            best = True
-                self.hook_evaluation(variant, run, accept, best)
-                pop[sol] = run
-                self.stats['steps'] += 1
+            if self.resume_file:
+                pop = self.pop_from_state(state['pop'])
+            else:
+                self.evaluate_offsprings(offsprings, pop)
 
             # main loop
             while not self.stopping_condition():
+                self.hook_checkpoint(pop=self.pop_to_state(pop))
                 self.stats['gen'] += 1
                 self.hook_main_loop()
                 offsprings = []
@@ -130,24 +111,7 @@ class GeneticProgramming(magpie.core.BasicAlgorithm):
                     offsprings.append(sol)
                 # replace
                 pop.clear()
-                local_best_fitness = None
-                for sol in offsprings:
-                    if self.stopping_condition():
-                        break
-                    variant = magpie.core.Variant(self.software, sol)
-                    run = self.evaluate_variant(variant)
-                    accept = best = False
-                    if run.status == 'SUCCESS':
-                        if self.dominates(run.fitness, local_best_fitness):
-                            local_best_fitness = run.fitness
-                            accept = True
-                            if self.dominates(run.fitness, self.report['best_fitness']):
-                                self.report['best_fitness'] = run.fitness
-                                self.report['best_patch'] = sol
-                                best = True
-                    self.hook_evaluation(variant, run, accept, best)
-                    pop[sol] = run
-                    self.stats['steps'] += 1
+                self.evaluate_offsprings(offsprings, pop, check_stop=True)
 
         except KeyboardInterrupt:
             self.report['stop'] = 'keyboard interrupt'
@@ -156,6 +120,61 @@ class GeneticProgramming(magpie.core.BasicAlgorithm):
             # the end
             self.hook_end()
 
+    def initial_offsprings(self):
+        offsprings = []
+        tries = magpie.settings.edit_retries
+        expected = self.config['pop_size']
+        while tries and len(offsprings) < expected:
+            sol = magpie.core.Patch()
+            self.mutate(sol)
+            if sol in offsprings:
+                tries -= 1
+                continue
+            offsprings.append(sol)
+        got = len(offsprings)
+        if got < expected:
+            self.report['stop'] = f'unable to fill initial population ({got} unique edits generated < {expected})'
+        return offsprings
+
+    @staticmethod
+    def pop_to_state(pop):
+        return {sol: (run.status, run.fitness) for sol, run in pop.items()}
+
+    @staticmethod
+    def pop_from_state(state):
+        pop = {}
+        for sol, (status, fitness) in state.items():
+            pop[sol] = magpie.core.RunResult(None, status)
+            pop[sol].fitness = fitness
+        return pop
+
+    def evaluate_offsprings(self, offsprings, pop, check_stop=False):
+        # evaluates as many offsprings at once as there are workers
+        local_best_fitness = None
+        i = 0
+        while i < len(offsprings):
+            if check_stop and self.stopping_condition():
+                break
+            k = self.software.pool.size
+            if self.stop['steps'] is not None:
+                k = max(1, min(k, self.stop['steps'] - self.stats['steps']))
+            variants = [magpie.core.Variant(self.software, sol) for sol in offsprings[i:i+k]]
+            i += k
+            for variant, run in zip(variants, self.evaluate_variants(variants)):
+                sol = variant.patch
+                accept = best = False
+                if run.status == 'SUCCESS':
+                    if self.dominates(run.fitness, local_best_fitness):
+                        local_best_fitness = run.fitness
+                        accept = True
+                        if self.dominates(run.fitness, self.report['best_fitness']):
+                            self.report['best_fitness'] = run.fitness
+                            self.report['best_patch'] = sol
+                            best = True
+                self.hook_evaluation(variant, run, accept, best)
+                pop[sol] = run
+                self.stats['steps'] += 1
+
     def mutate(self, patch):
         if patch.edits and random.random() < self.config['delete_prob']:
             del patch.edits[random.randrange(0, len(patch.edits))]
@@ -178,7 +197,7 @@ class GeneticProgramming(magpie.core.BasicAlgorithm):
     def hook_main_loop(self):
         if self.config['batch_reset']:
             for a in self.config['batch_bins']:
-                random.shuffle(a)
+                a.shuffle()
             self.hook_reset_batch()
 
 
@@ -284,3 +303,119 @@ class GeneticProgrammingUniformInter(GeneticProgramming):
         return c
 
 magpie.utils.known_algos.append(GeneticProgrammingUniformInter)
+
+
+class GeneticProgrammingSteadyState(GeneticProgramming):
+    def __init__(self):
+        super().__init__()
+        self.name = 'Genetic Programming (steady state)'
+
+    def aux_log_counter(self):
+        return str(self.stats['steps']+1)
+
+    def run(self):
+        try:
+            # warmup
+            self.hook_warmup()
+            if self.resume_file:
+                state = self.resume()
+            else:
+                # initial grow first to avoid wasting warmup
+                offsprings = self.initial_offsprings()
+                if self.report['stop']:
+                    return
+
+                # actual warmup
+                self.warmup()
+
+            # early stop if something went wrong during warmup
+            if self.report['stop']:
+                return
+
+            # start!
+            self.hook_start()
+
+            # main loop: keeps as many evaluations in flight as there are workers
+            pop = {}
+            pending = {}
+            if self.resume_file:
+                pop = self.pop_from_state(state['pop'])
+                offsprings = state['offsprings']
+            while True:
+                # in-flight evaluations are restarted on resume
+                self.hook_checkpoint(pop=self.pop_to_state(pop), offsprings=[variant.patch for variant in pending.values()] + offsprings)
+                while len(pending) < self.software.pool.size and not self.stopping_condition():
+                    if self.stop['steps'] is not None and self.stats['steps'] + len(pending) >= self.stop['steps']:
+                        break
+                    sol = offsprings.pop(0) if offsprings else self.create_offspring(pop, pending)
+                    variant = magpie.core.Variant(self.software, sol)
+                    pending[self.submit_variant(variant)] = variant
+                if not pending:
+                    break
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    variant = pending.pop(future)
+                    self.insert_offspring(variant, self.collect_variant(future), pop)
+
+        except KeyboardInterrupt:
+            self.report['stop'] = 'keyboard interrupt'
+
+        finally:
+            # the end
+            self.hook_end()
+
+    def create_offspring(self, pop, pending):
+        parents = self.select(pop)
+        in_flight = [variant.patch for variant in pending.values()]
+        tries = magpie.settings.edit_retries
+        while True:
+            if not parents:
+                sol = magpie.core.Patch()
+                self.mutate(sol)
+            elif random.random()*(self.config['offspring_crossover']+self.config['offspring_mutation']) < self.config['offspring_crossover']:
+                k = max(1, int(self.config['pop_size']*self.config['offspring_crossover']))
+                parent = copy.deepcopy(random.choice(parents[:k]))
+                sol = copy.deepcopy(random.choice(parents))
+                if random.random() > 0.5:
+                    sol = self.crossover(parent, sol)
+                else:
+                    sol = self.crossover(sol, parent)
+            else:
+                k = max(1, int(self.config['pop_size']*self.config['offspring_mutation']))
+                sol = copy.deepcopy(random.choice(parents[:k]))
+                self.mutate(sol)
+            tries -= 1
+            if tries <= 0 or (sol not in pop and sol not in in_flight):
+                return sol
+
+    def insert_offspring(self, variant, run, pop):
+        # replaces the worst individual (failed ones first)
+        sol = variant.patch
+        accept = best = False
+        if sol in pop or len(pop) < self.config['pop_size']:
+            # (duplicates, e.g., after edit_retries failed tries, only update their run)
+            pop[sol] = run
+            accept = run.status == 'SUCCESS'
+        elif run.status == 'SUCCESS':
+            worst = self.worst(pop)
+            if pop[worst].status != 'SUCCESS' or not self.dominates(pop[worst].fitness, run.fitness):
+                del pop[worst]
+                pop[sol] = run
+                accept = True
+        if accept and self.dominates(run.fitness, self.report['best_fitness']):
+            self.report['best_fitness'] = run.fitness
+            self.report['best_patch'] = sol
+            best = True
+        self.hook_evaluation(variant, run, accept, best)
+        self.stats['steps'] += 1
+
+    def worst(self, pop):
+        worst = None
+        for sol, run in pop.items():
+            if run.status != 'SUCCESS':
+                return sol
+            if worst is None or self.dominates(pop[worst].fitness, run.fitness):
+                worst = sol
+        return worst
+
+magpie.utils.known_algos.append(GeneticProgrammingSteadyState)
@@ -22,14 +22,19 @@ class LocalSearch(magpie.core.BasicAlgorithm):
         super().setup(config)
         sec = config['search.ls']
         self.config['delete_prob'] = float(sec['delete_prob'])
-        self.config['max_neighbours'] = int(val) if (val := sec['max_neighbours']) else None
+        if val := sec['max_neighbours']:
+            self.config['max_neighbours'] = int(val) # otherwise keeps the algorithm's default
         self.config['when_trapped'] = sec['when_trapped']
 
     def run(self):
         try:
             # warmup
             self.hook_warmup()
-            self.warmup()
+            state = None
+            if self.resume_file:
+                state = self.resume()
+            else:
+                self.warmup()
 
             # early stop if something went wrong during warmup
             if self.report['stop']:
@@ -39,9 +44,12 @@ class LocalSearch(magpie.core.BasicAlgorithm):
             self.hook_start()
 
             # main loop
-            current_patch = self.report['best_patch']
-            current_fitness = self.report['best_fitness']
+            if state is None:
+                state = {'current_patch': self.report['best_patch'], 'current_fitness': self.report['best_fitness']}
+            current_patch = state['current_patch']
+            current_fitness = state['current_fitness']
             while not self.stopping_condition():
+                self.hook_checkpoint(current_patch=current_patch, current_fitness=current_fitness)
                 self.hook_main_loop()
                 current_patch, current_fitness = self.explore(current_patch, current_fitness)
 
@@ -113,7 +121,7 @@ class DebugSearch(LocalSearch):
                     best = True
 
             # hook
-            self.hook_evaluation(patch, run, accept, best)
+            self.hook_evaluation(variant, run, accept, best)
 
             # next
             self.stats['steps'] += 1
@@ -192,7 +200,7 @@ class RandomWalk(LocalSearch):
             self.check_if_trapped()
 
         # hook
-        self.hook_evaluation(patch, run, accept, best)
+        self.hook_evaluation(variant, run, accept, best)
 
         # next
         self.stats['steps'] += 1
@@ -207,6 +215,9 @@ class FirstImprovement(LocalSearch):
         self.name = 'First Improvement'
         self.local_tabu = set()
 
+    def checkpoint_attributes(self):
+        return {'local_tabu': self.local_tabu}
+
     def explore(self, current_patch, current_fitness):
         # move
         while True:
@@ -258,6 +269,13 @@ class BestImprovement(LocalSearch):
         self.local_best_fitness = None
         self.local_tabu = set()
 
+    def checkpoint_attributes(self):
+        return {
+            'local_best_patch': self.local_best_patch,
+            'local_best_fitness': self.local_best_fitness,
+            'local_tabu': self.local_tabu,
+        }
+
     def explore(self, current_patch, current_fitness):
         # move
         while True:
@@ -299,7 +317,7 @@ class BestImprovement(LocalSearch):
             self.check_if_trapped()
 
         # hook
-        self.hook_evaluation(patch, run, accept, best)
+        self.hook_evaluation(variant, run, accept, best)
 
         # next
         self.stats['steps'] += 1
@@ -317,6 +335,13 @@ class WorstImprovement(LocalSearch):
         self.local_worst_fitness = None
         self.local_tabu = set()
 
+    def checkpoint_attributes(self):
+        return {
+            'local_worst_patch': self.local_worst_patch,
+            'local_worst_fitness': self.local_worst_fitness,
+            'local_tabu': self.local_tabu,
+        }
+
     def explore(self, current_patch, current_fitness):
         # move
         while True:
@@ -358,7 +383,7 @@ class WorstImprovement(LocalSearch):
             self.check_if_trapped()
 
         # hook
-        self.hook_evaluation(patch, run, accept, best)
+        self.hook_evaluation(variant, run, accept, best)
 
         # next
         self.stats['steps'] += 1
@@ -375,10 +400,13 @@ class TabuSearch(BestImprovement):
         self.tabu_list = [magpie.core.Patch()] # queues are not iterable
         self.local_tabu = set()
 
+    def checkpoint_attributes(self):
+        return {**super().checkpoint_attributes(), 'tabu_list': self.tabu_list}
+
     def setup(self, config):
         super().setup(config)
         sec = config['search.ls']
-        self.config['tabu_length'] = sec['tabu_length']
+        self.config['tabu_length'] = int(sec['tabu_length'])
 
     def explore(self, current_patch, current_fitness):
         # move
@@ -411,7 +439,7 @@ class TabuSearch(BestImprovement):
                 self.local_best_fitness = None
                 self.local_tabu.clear()
                 self.stats['neighbours'] = 0
-                self.tabu_list.append(self.local_best_patch)
+                self.tabu_list.append(current_patch)
                 while len(self.tabu_list) >= self.config['tabu_length']:
                     self.tabu_list.pop(0)
             else:
@@ -423,7 +451,7 @@ class TabuSearch(BestImprovement):
             self.check_if_trapped()
 
         # hook
-        self.hook_evaluation(patch, run, accept, best)
+        self.hook_evaluation(variant, run, accept, best)
 
         # next
         self.stats['steps'] += 1
@@ -11,6 +11,10 @@ class ValidSearch(LocalSearch):
         super().__init__()
         self.debug_patch = None
 
+    def setup(self, config):
+        super().setup(config)
+        self.surrogate = None # patches must always be actually evaluated
+
     def hook_warmup(self):
         super().hook_warmup()
         if self.debug_patch is None:
@@ -37,12 +41,12 @@ class ValidSearch(LocalSearch):
         self.stats['steps'] += 1
 
     def do_cleanup(self, variant):
-        cleaned = copy.deepcopy(variant)
+        cleaned = variant
         for k in reversed(range(len(variant.patch.edits))):
             patch = copy.deepcopy(cleaned.patch)
             del patch.edits[k]
             tmp = magpie.core.Variant(self.software, patch)
-            if tmp.diff == variant.diff:
+            if tmp.key == variant.key:
                 self.software.logger.info('removed %s', cleaned.patch.edits[k])
                 cleaned = tmp
         s1, s2 = len(cleaned.patch.edits), len(variant.patch.edits)
@@ -190,3 +194,63 @@ class ValidMinify(ValidSearch):
         return self.report['best_patch'], self.report['best_fitness']
 
 magpie.utils.known_algos.append(ValidMinify)
+
+
+class ValidMinifyDD(ValidMinify):
+    def __init__(self):
+        super().__init__()
+        self.name = 'Minify Patch (ddmin)'
+
+    def explore(self, current_patch, current_fitness):
+        variant = magpie.core.Variant(self.software, current_patch)
+
+        # cleanup
+        if self.config['do_cleanup']:
+            self.software.logger.info('---- cleanup ----')
+            variant = self.do_cleanup(variant)
+            self.report['best_patch'] = variant.patch
+
+        # full patch first
+        self.software.logger.info('---- initial patch ----')
+        if not variant.patch.edits:
+            self.report['stop'] = 'validation end (empty patch)'
+            return self.report['best_patch'], self.report['best_fitness']
+        run = self.evaluate_variant(variant)
+        self.hook_evaluation(variant, run)
+        if run.status != 'SUCCESS':
+            self.report['stop'] = 'validation end (invalid patch)'
+            return self.report['best_patch'], self.report['best_fitness']
+
+        # delta debugging: every partition and complement of a round is evaluated concurrently
+        # (candidates are compared to the full patch; the smallest passing one wins, subsets first)
+        self.software.logger.info('---- ddmin ----')
+        edits = variant.patch.edits
+        target_fitness = run.fitness
+        n = 2
+        while len(edits) > 1:
+            n = min(n, len(edits))
+            chunks = [edits[len(edits)*i//n:len(edits)*(i+1)//n] for i in range(n)]
+            candidates = [(chunk, 2) for chunk in chunks]
+            if n > 2:
+                candidates.extend(([e for c in chunks if c is not chunk for e in c], max(n-1, 2)) for chunk in chunks)
+            variants = [magpie.core.Variant(self.software, magpie.core.Patch(list(c))) for c, _ in candidates]
+            best = None
+            for i, ((chunk, next_n), tmp, run) in enumerate(zip(candidates, variants, self.evaluate_variants(variants))):
+                self.hook_evaluation(tmp, run)
+                if run.status == 'SUCCESS' and self.dominates_or_equal(run.fitness, target_fitness):
+                    is_subset = i < len(chunks)
+                    if best is None or len(chunk) < len(best[0]) or (len(chunk) == len(best[0]) and is_subset == best[3] and self.dominates(run.fitness, best[2])):
+                        best = (chunk, next_n, run.fitness, is_subset)
+            if best is not None:
+                edits, n, fitness, _ = best
+                self.report['best_patch'] = magpie.core.Patch(list(edits)) # accept because smaller
+                self.report['best_fitness'] = fitness
+            elif n < len(edits):
+                n = min(2*n, len(edits))
+            else:
+                break # 1-minimal
+
+        self.report['stop'] = 'validation end'
+        return self.report['best_patch'], self.report['best_fitness']
+
+magpie.utils.known_algos.append(ValidMinifyDD)
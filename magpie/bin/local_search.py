@@ -13,6 +13,7 @@ if __name__ == '__main__':
     parser.add_argument('--scenario', type=pathlib.Path, required=True)
     parser.add_argument('--algo', type=str)
     parser.add_argument('--seed', type=int)
+    parser.add_argument('--resume', type=pathlib.Path)
     args = parser.parse_args()
 
     # read scenario file
@@ -37,6 +38,7 @@ if __name__ == '__main__':
     magpie.core.setup(config)
     protocol = magpie.utils.protocol_from_string(config['search']['protocol'])()
     protocol.search = algo()
+    protocol.search.resume_file = args.resume
     protocol.software = magpie.utils.software_from_string(config['software']['software'])(config)
 
     # run experiments
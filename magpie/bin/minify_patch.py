@@ -12,6 +12,7 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Magpie patch minifier')
     parser.add_argument('--scenario', type=pathlib.Path, required=True)
     parser.add_argument('--patch', type=str, required=True)
+    parser.add_argument('--algo', type=str)
     parser.add_argument('--seed', type=int)
     args = parser.parse_args()
 
@@ -27,11 +28,21 @@ if __name__ == '__main__':
             args.patch = f.read().strip()
     patch = magpie.core.Patch.from_string(args.patch)
 
+    # select minify algorithm
+    if args.algo is not None:
+        algo = magpie.utils.algo_from_string(args.algo)
+        if not issubclass(algo, magpie.algos.ValidMinify):
+            msg = f'Invalid minify algorithm "{algo.__name__}"'
+            raise RuntimeError(msg)
+        config['search']['algorithm'] = args.algo
+    else:
+        config['search']['algorithm'] = 'ValidMinify'
+        algo = magpie.algos.ValidMinify
+
     # setup
-    config['search']['algorithm'] = 'ValidMinify'
     magpie.core.setup(config)
     protocol = magpie.utils.protocol_from_string(config['search']['protocol'])()
-    protocol.search = magpie.utils.algo_from_string(config['search']['algorithm'])()
+    protocol.search = algo()
     protocol.search.debug_patch = patch
     protocol.software = magpie.utils.software_from_string(config['software']['software'])(config)
 
@@ -36,7 +36,7 @@ class AbstractAlgorithm(abc.ABC):
 
     def create_edit(self, variant=None):
         ref = variant or self.software.noop_variant
-        klass = random.choice(self.config['possible_edits'])
+        klass = self.select_edit_class()
         tries = magpie.settings.edit_retries
         while (edit := klass.auto_create(ref)) is None:
             tries -= 1
@@ -45,6 +45,9 @@ class AbstractAlgorithm(abc.ABC):
                 raise RuntimeError(msg)
         return edit
 
+    def select_edit_class(self):
+        return random.choice(self.config['possible_edits'])
+
     def dominates(self, fit1, fit2):
         if fit1 is None:
             return False
@@ -1,4 +1,5 @@
 import abc
+import copy
 import pathlib
 import random
 
@@ -25,6 +26,15 @@ class AbstractModel(abc.ABC):
     def dump(self):
         pass
 
+    def clone(self):
+        # edits only ever modify contents and locations
+        model = copy.copy(self)
+        model.contents = copy.deepcopy(self.contents)
+        model.locations = copy.deepcopy(self.locations)
+        if self.locations_names is self.locations:
+            model.locations_names = model.locations
+        return model
+
     def show_location(self, target_type, target_loc):
         msg = '(unsupported)'
         if magpie.settings.color_output:
@@ -39,14 +49,15 @@ class AbstractModel(abc.ABC):
             raise RuntimeError
         if dump == self.cached_dump:
             if self.trust_local:
-                return
+                return False
             with pathlib.Path(self.renamed_filename).open('r') as tmp_file:
                 if tmp_file.read() == dump:
-                    return
+                    return False
             self.trust_local = True
         # write only if file _really_ changed
         with pathlib.Path(self.renamed_filename).open('w') as tmp_file:
             tmp_file.write(dump)
+        return True
 
     def random_target(self, target_type=None):
         if target_type is None:
@@ -2,6 +2,7 @@ import abc
 import contextlib
 import errno
 import logging
+import math
 import os
 import pathlib
 import platform
@@ -15,7 +16,9 @@ import time
 import magpie.settings
 
 from .execresult import ExecResult
+from .timing import timed
 from .variant import Variant
+from .worker_pool import WorkerPool
 
 
 class AbstractSoftware(abc.ABC):
@@ -26,6 +29,8 @@ class AbstractSoftware(abc.ABC):
         self.target_files = []
         self.noop_variant = None
         self.work_dir = None
+        self.manifest = None # files written by Magpie in the work directory
+        self.pool = WorkerPool(self, magpie.settings.workers)
 
         if reset:
             self.reset_timestamp()
@@ -113,21 +118,40 @@ class AbstractSoftware(abc.ABC):
     def evaluate_variant(self, variant, cached_run=None):
         pass
 
-    def write_variant(self, variant):
+    def submit_variant(self, variant, cached_run=None):
+        # evaluation in one of the worker copies of the software
+        return self.pool.submit(variant, cached_run)
+
+    def write_variant(self, variant, timings=None):
+        if timings is None:
+            timings = {}
+
         # reset work directory
         work_path = self.work_dir / self.basename
-        self.sync_folder(work_path, self.path)
+        with timed(timings, 'sync'):
+            if magpie.settings.sync_mode == 'manifest' and self.manifest is not None and work_path.exists():
+                # only restore files previously written by Magpie
+                # (with a fresh mtime, for incremental builds)
+                for filename in self.manifest:
+                    shutil.copyfile(self.path / filename, work_path / filename)
+            else:
+                self.sync_folder(work_path, self.path)
 
         # process modified files
-        with contextlib.chdir(work_path):
+        self.manifest = set()
+        with contextlib.chdir(work_path), timed(timings, 'write'):
             for filename in self.target_files:
-                variant.models[filename].write_to_file()
+                model = variant.models[filename]
+                if magpie.settings.work_backend == 'hardlink':
+                    _unshare_file(model.renamed_filename)
+                if model.write_to_file():
+                    self.manifest.add(model.renamed_filename)
 
     def sync_folder(self, target, original):
         try:
             contents_target = os.listdir(target)
         except FileNotFoundError:
-            shutil.copytree(original, target)
+            _copy_tree(original, target)
             return
         contents_original = os.listdir(original)
         for entry in contents_target:
@@ -156,7 +180,7 @@ class AbstractSoftware(abc.ABC):
                     self.sync_folder(target_entry, original_entry)
                 else:
                     # deleted directory (?)
-                    shutil.copytree(original_entry, target_entry)
+                    _copy_tree(original_entry, target_entry)
             elif entry not in contents_target:
                 # deleted file
                 shutil.copyfile(original_entry, target_entry)
@@ -172,40 +196,21 @@ class AbstractSoftware(abc.ABC):
         env = env or os.environ.copy()
         env['MAGPIE_ROOT'] = magpie.settings.magpie_root
         env['MAGPIE_LOG_DIR'] = magpie.settings.log_dir
-        env['MAGPIE_WORK_DIR'] = magpie.settings.work_dir
+        env['MAGPIE_WORK_DIR'] = str(self.work_dir or magpie.settings.work_dir) # per worker
         env['MAGPIE_BASENAME'] = self.basename
         env['MAGPIE_TIMESTAMP'] = self.timestamp
         try:
             is_posix = os.name == 'posix'
             with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=shell, env=env, start_new_session=is_posix) as sprocess:
-                if lengthout > 0:
-                    stdout_size = 0
-                    stderr_size = 0
-                    while sprocess.poll() is None:
-                        end = time.time()
-                        if end-start > timeout:
-                            _kill_proc_with_children(sprocess)
-                            return ExecResult(cmd, 'TIMEOUT', sprocess.returncode, stdout, stderr, end-start, stdout_size+stderr_size)
-                        a = select.select([sprocess.stdout, sprocess.stderr], [], [], 1)[0]
-                        if sprocess.stdout in a:
-                            for _ in range(1024):
-                                if not select.select([sprocess.stdout], [], [], 0)[0]:
-                                    break
-                                stdout += sprocess.stdout.read(1)
-                                stdout_size += 1
-                        if sprocess.stderr in a:
-                            for _ in range(1024):
-                                if not select.select([sprocess.stderr], [], [], 0)[0]:
-                                    break
-                                stderr += sprocess.stderr.read(1)
-                                stderr_size += 1
-                        if stdout_size+stderr_size >= lengthout:
-                            _kill_proc_with_children(sprocess)
-                            _, _ = sprocess.communicate()
-                            return ExecResult(cmd, 'LENGTHOUT', sprocess.returncode, stdout, stderr, end-start, stdout_size+stderr_size)
+                if lengthout > 0 or _HAS_WAIT4:
+                    status, stdout, stderr = self._capture_output(sprocess, start, timeout, int(lengthout) if lengthout > 0 else None)
                     end = time.time()
-                    stdout += sprocess.stdout.read()
-                    stderr += sprocess.stderr.read()
+                    if status != 'SUCCESS':
+                        _kill_proc_with_children(sprocess)
+                        rusage = _wait_proc(sprocess)
+                        return ExecResult(cmd, status, sprocess.returncode, stdout, stderr, end-start, len(stdout)+len(stderr), rusage)
+                    rusage = _wait_proc(sprocess)
+                    return ExecResult(cmd, 'SUCCESS', sprocess.returncode, stdout, stderr, end-start, len(stdout)+len(stderr), rusage)
                 else:
                     try:
                         stdout, stderr = sprocess.communicate(timeout=timeout)
@@ -219,7 +224,41 @@ class AbstractSoftware(abc.ABC):
         except FileNotFoundError:
             return ExecResult(cmd, 'CLI_ERROR', -1, b'', b'', 0, 0)
 
+    @staticmethod
+    def _capture_output(sprocess, start, timeout, lengthout=None):
+        # chunked reads into a single preallocated buffer
+        chunk = memoryview(bytearray(min(_CHUNK_SIZE, lengthout or _CHUNK_SIZE)))
+        outputs = {sprocess.stdout.fileno(): bytearray(), sprocess.stderr.fileno(): bytearray()}
+        open_fds = list(outputs)
+        remaining = lengthout or math.inf
+        status = 'SUCCESS'
+        while open_fds:
+            elapsed = time.time()-start
+            if elapsed > timeout:
+                status = 'TIMEOUT'
+                break
+            # once the process is done only drain what is immediately available
+            exited = _proc_exited(sprocess)
+            ready = select.select(open_fds, [], [], 0 if exited else min(1, timeout-elapsed))[0]
+            if not ready and exited:
+                break
+            for fd in ready:
+                n = os.readv(fd, [chunk[:remaining] if remaining < len(chunk) else chunk])
+                if n == 0:
+                    open_fds.remove(fd)
+                    continue
+                outputs[fd] += chunk[:n]
+                remaining -= n
+                if remaining <= 0:
+                    status = 'LENGTHOUT'
+                    break
+            if status != 'SUCCESS':
+                break
+        stdout, stderr = (bytes(b) for b in outputs.values())
+        return status, stdout, stderr
+
     def clean_work_dir(self):
+        self.pool.shutdown()
         with contextlib.suppress(FileNotFoundError):
             shutil.rmtree(self.work_dir)
         with contextlib.suppress(FileNotFoundError):
@@ -229,6 +268,63 @@ class AbstractSoftware(abc.ABC):
                 if e.errno != errno.ENOTEMPTY:
                     raise
 
+def _copy_tree(original, target):
+    if magpie.settings.work_backend == 'hardlink':
+        shutil.copytree(original, target, symlinks=True, copy_function=_link_or_copy)
+    else:
+        shutil.copytree(original, target)
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # e.g., across filesystems
+        shutil.copy2(src, dst)
+
+def _unshare_file(path):
+    # replaces a hard link with a real copy, so that writing to it leaves the original untouched
+    path = pathlib.Path(path)
+    try:
+        if path.stat().st_nlink == 1:
+            return
+    except FileNotFoundError:
+        return
+    tmp_path = path.with_name(f'.{path.name}.magpie_tmp')
+    shutil.copy2(path, tmp_path)
+    tmp_path.replace(path)
+
+_CHUNK_SIZE = 1 << 16
+_HAS_WAIT4 = hasattr(os, 'wait4') and hasattr(os, 'waitid')
+
+if _HAS_WAIT4:
+    def _proc_exited(proc):
+        # unlike Popen.poll, leaves the process waitable (for wait4)
+        if proc.returncode is not None:
+            return True
+        try:
+            return os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None
+        except ChildProcessError:
+            return proc.poll() is not None
+
+    def _wait_proc(proc):
+        # reaps the process, returning its resource usage
+        if proc.returncode is not None:
+            return None
+        try:
+            _, wait_status, rusage = os.wait4(proc.pid, 0)
+        except ChildProcessError:
+            proc.wait()
+            return None
+        proc.returncode = os.waitstatus_to_exitcode(wait_status)
+        return rusage
+else:
+    def _proc_exited(proc):
+        return proc.poll() is not None
+
+    def _wait_proc(proc):
+        proc.wait()
+        return None
+
 if os.name == 'posix':
     def _kill_proc_with_children(proc):
         os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
@@ -1,3 +1,4 @@
+import json
 import math
 import pathlib
 import random
@@ -6,9 +7,17 @@ import time
 import magpie.settings
 import magpie.utils
 
+from . import timing
 from .abstract_algorithm import AbstractAlgorithm
+from .cache import LFUCache, LRUCache, SizeCache
+from .checkpoint import load_checkpoint, save_checkpoint
+from .disk_cache import DiskCache
 from .errors import ScenarioError
+from .instances import InstanceBin
 from .patch import Patch
+from .runresult import RunResult
+from .surrogate import NaiveBayesSurrogate
+from .timing import CProfileHook, merge_timings, timed
 from .variant import Variant
 
 
@@ -19,12 +28,28 @@ class BasicAlgorithm(AbstractAlgorithm):
         self.config['warmup_strategy'] = 'last'
         self.config['cache_maxsize'] = 40
         self.config['cache_keep'] = 0.2
+        self.config['cache_policy'] = 'lfu'
+        self.config['cache_file'] = None
+        self.config['checkpoint_interval'] = None
+        self.config['edit_selection'] = 'uniform'
+        self.config['surrogate_threshold'] = 0.9
+        self.config['surrogate_warmup'] = 20
+        self.config['surrogate_explore'] = 0.1
+        self.surrogate = None
+        self.edits_pending = {} # edits created but not yet evaluated (for edit_selection)
+        self.disk_cache = None
+        self.resume_file = None
+        self.checkpoint_time = None
+        self.profiler = None
+        self.cache_reset()
 
     def reset(self):
         super().reset()
         self.stats['cache_hits'] = 0
         self.stats['cache_misses'] = 0
-        self.cache_reset()
+        self.stats['surrogate_skips'] = 0
+        self.stats['edit_arms'] = {} # per edit class name: [evaluations, total reward]
+        self.stats['timings'] = {}
 
     def setup(self, config):
         sec = config['search']
@@ -35,6 +60,31 @@ class BasicAlgorithm(AbstractAlgorithm):
         self.stop['fitness'] = [float(s) for s in val.split('s')] if (val := sec['target_fitness']) else None
         self.config['cache_maxsize'] = int(val) if (val := sec['cache_maxsize']) else 0
         self.config['cache_keep'] = float(sec['cache_keep'])
+        if sec['cache_policy'] not in ['lfu', 'lru', 'size']:
+            msg = f'[search] cache_policy should be lfu, lru, or size (got "{sec["cache_policy"]}")'
+            raise ScenarioError(msg)
+        self.config['cache_policy'] = sec['cache_policy']
+        self.cache_reset()
+        if val := sec['cache_file']:
+            # cached results remain valid as long as the software and its evaluation are unchanged
+            scope = {'magpie': {k: config['magpie'][k] for k in ['default_timeout', 'default_lengthout', 'output_encoding', 'diff_method']}}
+            for name in config.sections():
+                if name.split('.')[0] not in ['magpie', 'search']:
+                    scope[name] = dict(config[name])
+            self.config['cache_file'] = val
+            self.config['cache_scope'] = json.dumps(scope, sort_keys=True)
+        self.config['checkpoint_interval'] = float(val) if (val := sec['checkpoint_interval']) else None
+        if (val := sec['edit_selection']) not in ['uniform', 'ucb', 'thompson']:
+            msg = f'[search] edit_selection should be uniform, ucb, or thompson (got "{val}")'
+            raise ScenarioError(msg)
+        self.config['edit_selection'] = val
+        if (val := sec['surrogate']) not in ['', 'naive_bayes']:
+            msg = f'[search] surrogate should be empty or naive_bayes (got "{val}")'
+            raise ScenarioError(msg)
+        self.surrogate = NaiveBayesSurrogate() if val else None
+        self.config['surrogate_threshold'] = float(sec['surrogate_threshold'])
+        self.config['surrogate_warmup'] = int(sec['surrogate_warmup'])
+        self.config['surrogate_explore'] = float(sec['surrogate_explore'])
 
         self.config['possible_edits'] = []
         try:
@@ -47,18 +97,16 @@ class BasicAlgorithm(AbstractAlgorithm):
             msg = 'Invalid config file: "[search] possible_edits" must be non-empty!'
             raise ScenarioError(msg)
 
-        bins = [[]]
+        bins = [InstanceBin()]
         for s in sec['batch_instances'].splitlines():
             if s == '___':
                 if bins[-1]:
-                    bins.append([])
+                    bins.append(InstanceBin())
             elif s[:5] == 'file:':
                 try:
-                    with (pathlib.Path(config['software']['path']) / s[5:]).open('r') as bin_file:
-                        bins[-1].extend([line for line in [line.strip() for line in bin_file] if line and line[0] != '#'])
+                    bins[-1].extend_from_file(pathlib.Path(config['software']['path']) / s[5:])
                 except FileNotFoundError:
-                    with pathlib.Path(s[5:]).open('r') as bin_file:
-                        bins[-1].extend([line for line in [line.strip() for line in bin_file] if line and line[0] != '#'])
+                    bins[-1].extend_from_file(s[5:])
             else:
                 s.strip()
                 if s and s[0] != '#':
@@ -68,7 +116,7 @@ class BasicAlgorithm(AbstractAlgorithm):
         tmp = sec['batch_shuffle'].lower()
         if tmp in ['true', 't', '1']:
             for a in bins:
-                random.shuffle(a)
+                a.shuffle()
         elif tmp in ['false', 'f', '0']:
             pass
         else:
@@ -90,7 +138,7 @@ class BasicAlgorithm(AbstractAlgorithm):
         s = self.config['batch_sample_size']
         # TODO: sample with replacement, with refill
         if sum(len(b) for b in self.config['batch_bins']) <= s:
-            batch = list(self.config['batch_bins'])
+            batch = [list(b) for b in self.config['batch_bins']]
         else:
             batch = [[] for b in self.config['batch_bins']]
             while s > 0:
@@ -108,7 +156,9 @@ class BasicAlgorithm(AbstractAlgorithm):
         # reset reference fitness
         patch = Patch([])
         variant = Variant(self.software, patch)
-        run = self.evaluate_variant(variant)
+        self.software.race_reference = None
+        run = self.evaluate_variant(variant, surrogate=False)
+        self.software.race_reference = run.cache
         self.report['reference_fitness'] = run.fitness
         self.report['best_fitness'] = run.fitness
         self.hook_warmup_evaluation('REF', patch, run)
@@ -118,7 +168,7 @@ class BasicAlgorithm(AbstractAlgorithm):
         # update best patch
         if self.report['best_patch'] and self.report['best_patch'].edits:
             variant = Variant(self.software, self.report['best_patch'])
-            run = self.evaluate_variant(variant)
+            run = self.evaluate_variant(variant, surrogate=False)
             best = self.dominates(run.fitness, self.report['best_fitness'])
             self.hook_batch_evaluation('BEST', self.report['best_patch'], run, best)
             if run.status == 'SUCCESS' and best:
@@ -127,6 +177,9 @@ class BasicAlgorithm(AbstractAlgorithm):
                 self.report['best_patch'] = patch
 
     def hook_warmup(self):
+        if magpie.settings.profile:
+            self.profiler = CProfileHook()
+            timing.hooks.append(self.profiler)
         self.hook_reset_batch()
         self.stats['wallclock_start'] = self.stats['wallclock_warmup'] = time.time()
         msg = '~~~~ WARMUP ~~~~'
@@ -149,7 +202,7 @@ class BasicAlgorithm(AbstractAlgorithm):
             msg = 'Possible_edits list is empty'
             raise RuntimeError(msg)
         # TODO: check that every possible edit can be created and simplify create_edit
-        self.stats['wallclock_start'] = time.time() # discards warmup time
+        self.stats['wallclock_start'] = time.time() - self.stats.get('wallclock_offset', 0) # discards warmup time
         self.software.logger.info('')
         msg = '~~~~ START ~~~~'
         if magpie.settings.color_output:
@@ -159,7 +212,74 @@ class BasicAlgorithm(AbstractAlgorithm):
     def hook_main_loop(self):
         pass
 
+    def hook_checkpoint(self, **state):
+        # state: whatever is needed to resume the main loop (see resume)
+        if self.config['checkpoint_interval'] is None:
+            return
+        now = time.time()
+        if self.checkpoint_time is None:
+            self.checkpoint_time = now
+        if now < self.checkpoint_time + self.config['checkpoint_interval']:
+            return
+        self.checkpoint_time = now
+        filename = pathlib.Path(magpie.settings.log_dir) / f'{self.software.run_label}.checkpoint'
+        save_checkpoint(filename, {
+            'algorithm': self.__class__.__name__,
+            'elapsed': now - self.stats['wallclock_start'],
+            'stats': {k: v for k, v in self.stats.items() if not k.startswith('wallclock')},
+            'report': {k: self.report[k] for k in ['initial_patch', 'reference_patch', 'reference_fitness', 'best_fitness', 'best_patch']},
+            'attributes': self.checkpoint_attributes(),
+            'state': state,
+            'batch': self.software.batch,
+            'cache': [(key, run.status, run.fitness, run.cache) for key, run in self.cache.items()],
+            'surrogate': self.surrogate,
+            'random': random.getstate(),
+        })
+        self.software.logger.debug('Checkpoint file: %s', filename)
+
+    def checkpoint_attributes(self):
+        # algorithm-specific attributes to restore when resuming
+        return {}
+
+    def resume(self):
+        # replaces warmup, returning the state given to hook_checkpoint
+        data = load_checkpoint(self.resume_file)
+        if data['algorithm'] != self.__class__.__name__:
+            msg = f'Checkpoint file "{self.resume_file}" was created by {data["algorithm"]}'
+            raise RuntimeError(msg)
+        self.software.batch = data['batch']
+
+        # the reference software is still evaluated once (e.g., to run "[software] setup_cmd")
+        patch = Patch([])
+        variant = Variant(self.software, patch)
+        run = self.evaluate_variant(variant, force=True)
+        self.hook_warmup_evaluation('WARM', patch, run)
+        if run.status != 'SUCCESS':
+            step = run.status.split('_')[0].lower()
+            self.report['stop'] = f'failed to {step} target software'
+            return None
+
+        # restore everything else
+        for key, status, fitness, cache in data['cache']:
+            run = RunResult(None, status)
+            run.fitness = fitness
+            run.cache = cache
+            self.cache.set(key, run)
+        if (run := self.cache.get('')) is not None:
+            self.software.race_reference = run.cache
+        self.stats.update(data['stats'])
+        self.stats['wallclock_offset'] = data['elapsed']
+        self.report.update(data['report'])
+        for k, v in data['attributes'].items():
+            setattr(self, k, v)
+        if self.surrogate is not None and data.get('surrogate') is not None:
+            self.surrogate = data['surrogate']
+        random.setstate(data['random'])
+        self.software.logger.info('Resumed from %s (after %d steps)', self.resume_file, self.stats['steps'])
+        return data['state']
+
     def hook_evaluation(self, variant, run, accept=False, best=False):
+        self.edit_rewards(variant, run, best)
         data = self.aux_log_data(variant.patch, run, self.aux_log_counter(), self.report['reference_fitness'], accept, best)
         self.aux_log_print(data, run, accept, best)
 
@@ -190,10 +310,17 @@ class BasicAlgorithm(AbstractAlgorithm):
         data['patch'] = str(patch)
         data['patchifaccept'] = magpie.settings.log_format_patchif.format(patch=data['patch']) if accept else ''
         data['patchifbest'] = magpie.settings.log_format_patchif.format(patch=data['patch']) if best else ''
-        data['diff'] = run.variant.diff
+        # diffs are expensive, only compute them when actually logged
+        formats = f'{magpie.settings.log_format_info}{magpie.settings.log_format_debug}'
+        if '{diff}' in formats or (accept and '{diffifaccept}' in formats) or (best and '{diffifbest}' in formats):
+            with timed(self.stats['timings'], 'diff'):
+                data['diff'] = run.variant.diff
+        else:
+            data['diff'] = ''
         data['diffifaccept'] = magpie.settings.log_format_diffif.format(diff=data['diff']) if accept else ''
         data['diffifbest'] = magpie.settings.log_format_diffif.format(diff=data['diff']) if best else ''
         data['size'] = f'{len(patch.edits) if patch else 0} edit(s)'
+        data['timings'] = ' '.join(f'{phase}={elapsed:.3f}s' for phase, elapsed in run.timings.items()) if run.updated else ''
         data['cached'] = ''
         if run.cached:
             if run.updated:
@@ -231,6 +358,18 @@ class BasicAlgorithm(AbstractAlgorithm):
         if self.report['best_patch']:
             variant = Variant(self.software, self.report['best_patch'])
             self.report['diff'] = variant.diff
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+        self.report['timings'] = self.stats['timings']
+        self.report['edit_arms'] = {name: (n, total/n) for name, (n, total) in self.stats['edit_arms'].items()}
+        if self.surrogate is not None:
+            self.report['surrogate_skips'] = self.stats['surrogate_skips']
+        if self.profiler is not None:
+            timing.hooks.remove(self.profiler)
+            filename = pathlib.Path(magpie.settings.log_dir) / f'{self.software.run_label}.prof'
+            self.profiler.dump(filename)
+            self.report['profile_file'] = filename
+            self.profiler = None
         msg = '~~~~ END ~~~~'
         if magpie.settings.color_output:
             msg = f'\033[1m{msg}\033[0m'
@@ -266,7 +405,8 @@ class BasicAlgorithm(AbstractAlgorithm):
             msg = 'Unknown warmup strategy'
             raise ValueError(msg)
         run.fitness = current_fitness
-        self.cache_set(variant.diff, run)
+        self.cache_set(variant.key, run)
+        self.software.race_reference = run.cache
         self.hook_warmup_evaluation('REF', patch, run)
         self.report['reference_fitness'] = current_fitness
         if self.report['best_patch'] is None:
@@ -282,46 +422,142 @@ class BasicAlgorithm(AbstractAlgorithm):
                 self.report['best_patch'] = patch
                 self.report['best_fitness'] = current_fitness
 
-    def evaluate_variant(self, variant, force=False):
+    def evaluate_variant(self, variant, force=False, surrogate=True):
+        return self.collect_variant(self.submit_variant(variant, force, surrogate))
+
+    def submit_variant(self, variant, force=False, surrogate=True):
         cached_run = None
         if self.config['cache_maxsize'] > 0 and not force:
-            cached_run = self.cache_get(variant.diff) # potentially partial
-        run = self.software.evaluate_variant(variant, cached_run)
+            cached_run = self.cache_get(variant.key) # potentially partial
+            if cached_run is not None and cached_run.variant is None:
+                cached_run.variant = variant # loaded from disk
+        if cached_run is None and not force and surrogate and (run := self.surrogate_skip(variant)) is not None:
+            return self.software.pool.completed(run)
+        return self.software.submit_variant(variant, cached_run)
+
+    def collect_variant(self, future):
+        run = future.result()
+        if run.status == 'SURROGATE_SKIPPED':
+            self.collect_timings(run.variant, run)
+            return run
+        self.surrogate_observe(run.variant, run)
         if self.config['cache_maxsize'] > 0:
-            self.cache_set(variant.diff, run)
+            self.cache_set(run.variant.key, run)
         self.stats['budget'] += getattr(run, 'budget', 0) or 0
+        self.collect_timings(run.variant, run)
         return run
 
-    def cache_get(self, diff):
-        try:
-            run = self.cache[diff]
-        except KeyError:
+    def collect_timings(self, variant, run):
+        # variant construction is only accounted for once, run phases only when actually evaluated
+        merge_timings(self.stats['timings'], variant.timings)
+        variant.timings.clear()
+        if run.updated:
+            merge_timings(self.stats['timings'], run.timings)
+
+    def evaluate_variants(self, variants, force=False, surrogate=True):
+        # results are returned in order, whatever their completion order
+        futures = [self.submit_variant(variant, force, surrogate) for variant in variants]
+        return [self.collect_variant(future) for future in futures]
+
+    def create_edit(self, variant=None):
+        edit = super().create_edit(variant)
+        self.edits_pending[edit] = None
+        if len(self.edits_pending) > 1000:
+            # e.g., edits discarded before evaluation
+            del self.edits_pending[next(iter(self.edits_pending))]
+        return edit
+
+    def select_edit_class(self):
+        # multi-armed bandit over edit classes (see edit_rewards)
+        if self.config['edit_selection'] == 'uniform':
+            return super().select_edit_class()
+        classes = self.config['possible_edits']
+        arms = [self.stats['edit_arms'].get(klass.__name__, [0, 0]) for klass in classes]
+        if self.config['edit_selection'] == 'ucb':
+            if untried := [klass for klass, (n, _) in zip(classes, arms) if n == 0]:
+                return random.choice(untried)
+            total = sum(n for n, _ in arms)
+            scores = [r/n + math.sqrt(2*math.log(total)/n) for n, r in arms]
+        else:
+            scores = [random.betavariate(1 + r, 1 + n - r) for n, r in arms]
+        return classes[scores.index(max(scores))]
+
+    def edit_rewards(self, variant, run, best):
+        # rewards the classes of newly created edits: 1 for a new best, 0.5 for a success, 0 for a failure
+        if variant.patch is None or run.status == 'SURROGATE_SKIPPED':
+            return
+        reward = 1 if best else 0.5 if run.status == 'SUCCESS' else 0
+        for edit in variant.patch.edits:
+            if edit in self.edits_pending:
+                del self.edits_pending[edit]
+                arm = self.stats['edit_arms'].setdefault(edit.__class__.__name__, [0, 0])
+                arm[0] += 1
+                arm[1] += reward
+
+    def surrogate_skip(self, variant):
+        # a (never cached) run result if the variant is predicted to fail, None if it should be evaluated
+        if self.surrogate is None or self.surrogate.observations < self.config['surrogate_warmup']:
+            return None
+        if variant.patch is None or not variant.patch.edits:
+            return None # the reference software is never skipped
+        with timed(self.stats['timings'], 'surrogate'):
+            p = self.surrogate.predict(variant.patch)
+        if p < self.config['surrogate_threshold'] or random.random() < self.config['surrogate_explore']:
+            return None
+        self.stats['surrogate_skips'] += 1
+        return RunResult(variant, 'SURROGATE_SKIPPED')
+
+    def surrogate_observe(self, variant, run):
+        if self.surrogate is not None and run.updated:
+            with timed(self.stats['timings'], 'surrogate'):
+                self.surrogate.observe(variant.patch, run.status)
+
+    def cache_get(self, key):
+        with timed(self.stats['timings'], 'cache'):
+            run = self.cache.get(key)
+            if run is None:
+                run = self.cache_load(key)
+        if run is None:
             self.stats['cache_misses'] += 1
             return None
-        else:
-            self.stats['cache_hits'] += 1
-            if self.config['cache_maxsize'] > 0:
-                self.cache_hits[diff] += 1
-            run.cached = True
-            run.updated = False
-            return run
+        self.stats['cache_hits'] += 1
+        run.cached = True
+        run.updated = False
+        return run
+
+    def cache_load(self, key):
+        # the reference software is never loaded from the on-disk cache
+        if not self.config['cache_file'] or key == '':
+            return None
+        run = self.cache_disk().get(key)
+        if run is not None:
+            self.cache.set(key, run) # already on disk
+        return run
+
+    def cache_disk(self):
+        if self.disk_cache is None:
+            scope = [self.config['cache_scope']]
+            for filename in self.software.target_files:
+                scope.extend([filename, self.software.noop_variant.models[filename].cached_dump])
+            self.disk_cache = DiskCache(self.config['cache_file'], '\n'.join(scope))
+        return self.disk_cache
 
-    def cache_set(self, diff, run):
-        msize = self.config['cache_maxsize']
-        if 0 < msize < len(self.cache_hits):
-            keep = self.config['cache_keep']
-            hits = sorted(self.cache.keys(), key=lambda k: 999 if len(k) == 0 else self.cache_hits[k])
-            for k in hits[:int(msize*(1-keep))]:
-                del self.cache[k]
-            self.cache_hits = dict.fromkeys(self.cache, 0)
-        if diff not in self.cache:
-            self.cache_hits[diff] = 0
-        self.cache[diff] = run
+    def cache_set(self, key, run):
+        with timed(self.stats['timings'], 'cache'):
+            self.cache.set(key, run)
+            if self.config['cache_file'] and key != '' and run.updated:
+                self.cache_disk().set(key, run)
 
     def cache_copy(self, algo):
         self.cache = algo.cache
-        self.cache_hits = algo.cache_hits
+        self.disk_cache = algo.disk_cache
 
     def cache_reset(self):
-        self.cache = {}
-        self.cache_hits = {}
+        # note: the reference software (empty key) is never evicted
+        policy = self.config['cache_policy']
+        if policy == 'lfu':
+            self.cache = LFUCache(self.config['cache_maxsize'], self.config['cache_keep'])
+        elif policy == 'lru':
+            self.cache = LRUCache(self.config['cache_maxsize'], self.config['cache_keep'])
+        elif policy == 'size':
+            self.cache = SizeCache(1024*self.config['cache_maxsize'], self.config['cache_keep']) # kB to bytes
@@ -58,6 +58,16 @@ class BasicProtocol:
         for handler in logger.handlers:
             if handler.__class__.__name__ == 'FileHandler':
                 logger.info('Log file: %s', handler.baseFilename)
+        if result.get('timings'):
+            timings = sorted(result['timings'].items(), key=lambda c: -c[1])
+            logger.info('Time breakdown: %s', ', '.join(f'{phase} {elapsed:.2f}s' for phase, elapsed in timings))
+        if result.get('profile_file'):
+            logger.info('Profile file: %s', result['profile_file'])
+        if result.get('edit_arms'):
+            arms = sorted(result['edit_arms'].items(), key=lambda c: -c[1][0])
+            logger.info('Edit rewards: %s', ', '.join(f'{name} {mean:.2f} ({n})' for name, (n, mean) in arms))
+        if 'surrogate_skips' in result:
+            logger.info('Skipped by surrogate: %d', result['surrogate_skips'])
         if result['best_fitness'] and result['best_patch'] and result['best_patch'].edits:
             base_path = pathlib.Path(magpie.settings.log_dir) / self.software.run_label
             patch_file = f'{base_path}.patch'
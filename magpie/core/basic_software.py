@@ -1,12 +1,20 @@
+import collections
+import concurrent.futures
 import contextlib
+import hashlib
+import math
 import pathlib
+import pickle
 import shlex
+import shutil
+import tempfile
 
 import magpie.settings
 
 from .abstract_software import AbstractSoftware
 from .errors import ScenarioError
 from .runresult import RunResult
+from .timing import timed
 
 
 class BasicSoftware(AbstractSoftware):
@@ -104,6 +112,7 @@ class BasicSoftware(AbstractSoftware):
         self.run_lengthout = None
         self.batch_timeout = None
         self.batch_lengthout = None
+        self.batch_workers = 1
 
         # init
         if 'init_cmd' in config['software']:
@@ -155,6 +164,7 @@ class BasicSoftware(AbstractSoftware):
                 self.compile_lengthout = None
             else:
                 self.compile_lengthout = int(config['software']['compile_lengthout'])
+        self.artifacts = config['software']['artifacts'].split()
 
         # test
         if 'test_cmd' in config['software']:
@@ -198,9 +208,9 @@ class BasicSoftware(AbstractSoftware):
             tmp = '/'.join(known_strategies)
             msg = f'Invalid config file: "[software] batch_fitness_strategy" key must be {tmp}'
             raise ScenarioError(msg)
-        self.batch_bin_fitness_strategy = config['software']['batch_fitness_strategy']
+        self.batch_bin_fitness_strategy = config['software']['batch_bin_fitness_strategy']
         known_strategies = ['aggregate', 'sum', 'average', 'median', 'q10', 'q25', 'q75', 'q90']
-        if self.batch_fitness_strategy not in known_strategies:
+        if self.batch_bin_fitness_strategy not in known_strategies:
             tmp = '/'.join(known_strategies)
             msg = f'Invalid config file: "[software] batch_bin_fitness_strategy" key must be {tmp}'
             raise ScenarioError(msg)
@@ -214,6 +224,21 @@ class BasicSoftware(AbstractSoftware):
                 self.batch_lengthout = None
             else:
                 self.batch_lengthout = int(config['software']['batch_lengthout'])
+        self.batch_workers = int(config['software']['batch_workers'])
+        if self.batch_workers < 1:
+            msg = 'Invalid config file: "[software] batch_workers" must be a positive integer'
+            raise ScenarioError(msg)
+
+        # racing parameters
+        self.race_reference = None # per-instance results of the reference software (set by the search)
+        self.batch_racing = config['software']['batch_racing'] or None
+        if self.batch_racing not in [None, 'bound', 'sign']:
+            msg = 'Invalid config file: "[software] batch_racing" key must be empty or bound/sign'
+            raise ScenarioError(msg)
+        if self.batch_racing == 'bound' and self.fitness[0].maximize:
+            msg = 'Invalid config file: "[software] batch_racing = bound" requires a minimised fitness'
+            raise ScenarioError(msg)
+        self.batch_racing_alpha = float(config['software']['batch_racing_alpha'])
 
         # reset everything
         self.reset_timestamp()
@@ -221,6 +246,11 @@ class BasicSoftware(AbstractSoftware):
         self.reset_workdir()
         self.reset_contents()
 
+    def reset_workdir(self):
+        super().reset_workdir()
+        # content-addressed store of compiled artifacts (shared with workers)
+        self.artifacts_path = self.work_dir / '__artifacts__'
+
     def reset_contents(self):
         if not self.init_performed:
             self.init_performed = True
@@ -245,9 +275,10 @@ class BasicSoftware(AbstractSoftware):
 
     def evaluate_variant(self, variant, cached_run=None):
         # check batch sync
+        timings = {}
         if cached_run is None:
             # new variant
-            self.write_variant(variant)
+            self.write_variant(variant, timings)
         elif not cached_run.cache.keys():
             # cached (failed) --> early exit
             return cached_run
@@ -255,14 +286,20 @@ class BasicSoftware(AbstractSoftware):
             # cached (complete) --> early exit
             self.process_batch_final(cached_run)
             return cached_run
+        elif self.race_lost(cached_run):
+            # cached (partial, but already lost) --> early exit
+            cached_run.status = 'BATCH_RACED'
+            cached_run.fitness = None
+            return cached_run
         else:
             # partially cached
-            self.write_variant(variant)
+            self.write_variant(variant, timings)
 
         # evaluate
         work_path = self.work_dir / self.basename
         run_result = cached_run or RunResult(variant, 'UNKNOWN_ERROR')
         run_result.updated = True
+        run_result.timings = timings
 
         with contextlib.chdir(work_path):
             # serves as base before run_cmd
@@ -289,9 +326,10 @@ class BasicSoftware(AbstractSoftware):
                         setup_cmd = f'{setup_cmd} {cli}'
                     timeout = self.setup_timeout or magpie.settings.default_timeout
                     lengthout = self.setup_lengthout or magpie.settings.default_lengthout
-                    exec_result = self.exec_cmd(shlex.split(setup_cmd),
-                                                timeout=timeout,
-                                                lengthout=lengthout)
+                    with timed(timings, 'setup'):
+                        exec_result = self.exec_cmd(shlex.split(setup_cmd),
+                                                    timeout=timeout,
+                                                    lengthout=lengthout)
                     run_result.status = exec_result.status
                     run_result.last_exec = exec_result
                     if run_result.status == 'SUCCESS':
@@ -303,7 +341,8 @@ class BasicSoftware(AbstractSoftware):
                         return run_result
 
                 # sync work directory
-                self.sync_folder(self.path, work_path)
+                with timed(timings, 'sync'):
+                    self.sync_folder(self.path, work_path)
 
             # run "[software] compile_cmd" if provided
             if self.compile_cmd:
@@ -315,9 +354,19 @@ class BasicSoftware(AbstractSoftware):
                     compile_cmd = f'{compile_cmd} {cli}'
                 timeout = self.compile_timeout or magpie.settings.default_timeout
                 lengthout = self.compile_lengthout or magpie.settings.default_lengthout
-                exec_result = self.exec_cmd(shlex.split(compile_cmd),
-                                            timeout=timeout,
-                                            lengthout=lengthout)
+                exec_result = None
+                if self.artifacts:
+                    artifacts_key = self.artifacts_key(variant, compile_cmd)
+                    with timed(timings, 'artifacts'):
+                        exec_result = self.restore_artifacts(artifacts_key, work_path)
+                if exec_result is None:
+                    with timed(timings, 'compile'):
+                        exec_result = self.exec_cmd(shlex.split(compile_cmd),
+                                                    timeout=timeout,
+                                                    lengthout=lengthout)
+                    if self.artifacts and exec_result.status == 'SUCCESS':
+                        with timed(timings, 'artifacts'):
+                            self.store_artifacts(artifacts_key, work_path, exec_result)
                 run_result.status = exec_result.status
                 run_result.last_exec = exec_result
                 if run_result.status == 'SUCCESS':
@@ -341,9 +390,10 @@ class BasicSoftware(AbstractSoftware):
                     test_cmd = f'{test_cmd} {cli}'
                 timeout = self.test_timeout or magpie.settings.default_timeout
                 lengthout = self.test_lengthout or magpie.settings.default_lengthout
-                exec_result = self.exec_cmd(shlex.split(test_cmd),
-                                            timeout=timeout,
-                                            lengthout=lengthout)
+                with timed(timings, 'test'):
+                    exec_result = self.exec_cmd(shlex.split(test_cmd),
+                                                timeout=timeout,
+                                                lengthout=lengthout)
                 run_result.status = exec_result.status
                 run_result.last_exec = exec_result
                 if run_result.status == 'SUCCESS':
@@ -366,50 +416,173 @@ class BasicSoftware(AbstractSoftware):
                 lengthout = self.run_lengthout or magpie.settings.default_lengthout
                 batch_timeout = self.batch_timeout
                 batch_lengthout = self.batch_lengthout
-                insts = [inst for b in self.batch for inst in b]
-                for inst in insts:
-                    variant_fitness = default_variant_fitness[:]
-                    if inst in run_result.cache:
-                        continue
-                    run_cmd = self.run_cmd.strip()
-                    if '{INST}' in self.run_cmd:
-                        run_cmd = run_cmd.replace('{INST}', inst)
-                    else:
-                        run_cmd = f'{run_cmd} {inst}'
-                    if '{PARAMS}' in self.run_cmd:
-                        run_cmd = run_cmd.replace('{PARAMS}', cli)
-                    else:
-                        run_cmd = f'{run_cmd} {cli}'
-                    exec_result = self.exec_cmd(shlex.split(run_cmd),
-                                                timeout=timeout,
-                                                lengthout=lengthout)
-                    run_result.status = exec_result.status
-                    run_result.last_exec = exec_result
-                    if run_result.status == 'SUCCESS':
-                        for i, fit in enumerate(self.fitness):
+                insts = dict.fromkeys(inst for b in self.batch for inst in b)
+                insts = [inst for inst in insts if inst not in run_result.cache]
+                with contextlib.closing(self.exec_run_cmds(insts, cli, timeout, lengthout)) as exec_results:
+                    for inst in insts:
+                        variant_fitness = default_variant_fitness[:]
+                        if self.race_lost(run_result):
+                            run_result.status = 'BATCH_RACED'
                             run_result.fitness = None
-                            fit.process_run_exec(run_result, exec_result)
-                            if run_result.fitness is not None:
-                                variant_fitness[i] = run_result.fitness
-                    self.process_batch_single(run_result, inst, variant_fitness)
-                    if run_result.status != 'SUCCESS':
-                        run_result.status = f'RUN_{run_result.status}'
-                        break
-                    if batch_timeout:
-                        batch_timeout -= exec_result.runtime
-                        if batch_timeout < 0:
-                            run_result.status = 'BATCH_TIMEOUT'
-                            break
-                    if batch_lengthout:
-                        batch_lengthout -= exec_result.output_length
-                        if batch_lengthout < 0:
-                            run_result.status = 'BATCH_LENGTHOUT'
+                            return run_result
+                        with timed(timings, 'run'):
+                            exec_result = next(exec_results)
+                        run_result.status = exec_result.status
+                        run_result.last_exec = exec_result
+                        if run_result.status == 'SUCCESS':
+                            for i, fit in enumerate(self.fitness):
+                                run_result.fitness = None
+                                fit.process_run_exec(run_result, exec_result)
+                                if run_result.fitness is not None:
+                                    variant_fitness[i] = run_result.fitness
+                        self.process_batch_single(run_result, inst, variant_fitness)
+                        if run_result.status != 'SUCCESS':
+                            run_result.status = f'RUN_{run_result.status}'
                             break
+                        if batch_timeout:
+                            batch_timeout -= exec_result.runtime
+                            if batch_timeout < 0:
+                                run_result.status = 'BATCH_TIMEOUT'
+                                break
+                        if batch_lengthout:
+                            batch_lengthout -= exec_result.output_length
+                            if batch_lengthout < 0:
+                                run_result.status = 'BATCH_LENGTHOUT'
+                                break
                 self.process_batch_final(run_result)
 
         # final process
         return run_result
 
+    def artifacts_key(self, variant, compile_cmd):
+        # digest of the contents of all target files (through the variant key) and of the compile command
+        h = hashlib.blake2b(digest_size=16)
+        h.update(variant.key.encode())
+        h.update(b'\0')
+        h.update(compile_cmd.encode())
+        return h.hexdigest()
+
+    def restore_artifacts(self, key, work_path):
+        # returns the result of the original compilation, or None if these sources were never compiled
+        path = self.artifacts_path / key
+        try:
+            with (path / 'exec_result.pickle').open('rb') as f:
+                exec_result = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        for artifact in self.artifacts:
+            stored = path / 'files' / artifact
+            target = work_path / artifact
+            if stored.is_dir():
+                shutil.rmtree(target, ignore_errors=True)
+                shutil.copytree(stored, target, symlinks=True)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.unlink(missing_ok=True) # never write through hard links
+                shutil.copy2(stored, target)
+        return exec_result
+
+    def store_artifacts(self, key, work_path, exec_result):
+        # atomic, so that concurrent workers never see partially stored artifacts
+        path = self.artifacts_path / key
+        if path.exists():
+            return
+        self.artifacts_path.mkdir(exist_ok=True)
+        tmp_path = pathlib.Path(tempfile.mkdtemp(dir=self.artifacts_path, prefix='.tmp_'))
+        try:
+            for artifact in self.artifacts:
+                target = work_path / artifact
+                stored = tmp_path / 'files' / artifact
+                stored.parent.mkdir(parents=True, exist_ok=True)
+                if target.is_dir():
+                    shutil.copytree(target, stored, symlinks=True)
+                else:
+                    shutil.copy2(target, stored)
+            with (tmp_path / 'exec_result.pickle').open('wb') as f:
+                pickle.dump(exec_result, f)
+            tmp_path.rename(path)
+        except OSError:
+            # missing artifact, or already stored by another worker
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def format_run_cmd(self, inst, cli):
+        run_cmd = self.run_cmd.strip()
+        if '{INST}' in self.run_cmd:
+            run_cmd = run_cmd.replace('{INST}', inst)
+        else:
+            run_cmd = f'{run_cmd} {inst}'
+        if '{PARAMS}' in self.run_cmd:
+            run_cmd = run_cmd.replace('{PARAMS}', cli)
+        else:
+            run_cmd = f'{run_cmd} {cli}'
+        return run_cmd
+
+    def exec_run_cmds(self, insts, cli, timeout, lengthout):
+        # yields exec results in instance order, with up to "batch_workers" runs in flight
+        # (runs are only started on demand, so that closing the generator stops the batch)
+        cmds = (shlex.split(self.format_run_cmd(inst, cli)) for inst in insts)
+        if self.batch_workers == 1:
+            for cmd in cmds:
+                yield self.exec_cmd(cmd, timeout=timeout, lengthout=lengthout)
+            return
+        with concurrent.futures.ThreadPoolExecutor(self.batch_workers) as executor:
+            futures = collections.deque()
+            try:
+                for cmd in cmds:
+                    futures.append(executor.submit(self.exec_cmd, cmd, timeout=timeout, lengthout=lengthout))
+                    if len(futures) == self.batch_workers:
+                        yield futures.popleft().result()
+                while futures:
+                    yield futures.popleft().result()
+            finally:
+                # runs already started are waited for (they share the work directory)
+                for future in futures:
+                    future.cancel()
+
+    def submit_variant(self, variant, cached_run=None):
+        # one-time setup and cached runs are never delegated to workers
+        if not self.setup_performed:
+            return self.pool.completed(self.evaluate_variant(variant, cached_run))
+        if cached_run is not None:
+            if not cached_run.cache.keys() or {inst for b in self.batch for inst in b}.issubset(cached_run.cache.keys()):
+                return self.pool.completed(self.evaluate_variant(variant, cached_run))
+        return super().submit_variant(variant, cached_run)
+
+    def race_lost(self, run_result):
+        # whether the variant cannot (or is unlikely to) improve on the reference
+        if self.batch_racing is None or self.race_reference is None:
+            return False
+        insts = [inst for b in self.batch for inst in b]
+        if not all(inst in self.race_reference for inst in insts):
+            return False # reference evaluated on another batch
+        done = [inst for inst in insts if inst in run_result.cache]
+        if not done or any(run_result.cache[inst][0] != 'SUCCESS' for inst in done):
+            return False
+        if self.batch_racing == 'bound':
+            # lower bound on the final fitness, assuming nonnegative fitness values for remaining instances
+            bound = RunResult(None)
+            bound.cache = {inst: run_result.cache.get(inst, ('SUCCESS', [0 for _ in self.fitness])) for inst in insts}
+            self.process_batch_final(bound)
+            ref = RunResult(None)
+            ref.cache = self.race_reference
+            self.process_batch_final(ref)
+            return bound.fitness[0] > ref.fitness[0]
+        if self.batch_racing == 'sign':
+            # one-sided paired sign test on the first fitness value
+            worse = better = 0
+            for inst in done:
+                x, y = run_result.cache[inst][1][0], self.race_reference[inst][1][0]
+                if self.fitness[0].maximize:
+                    x, y = y, x
+                if x > y:
+                    worse += 1
+                elif x < y:
+                    better += 1
+            n = worse + better
+            p_value = sum(math.comb(n, k) for k in range(worse, n+1)) / 2**n
+            return p_value < self.batch_racing_alpha
+        return False
+
     def compute_local_cli(self, variant, step):
         cli = ''
         for target in self.target_files:
@@ -433,12 +606,11 @@ class BasicSoftware(AbstractSoftware):
                     run_result.fitness = None
                     return
                 bin_fitness.append(fitness)
-            multi = len(bin_fitness[0]) > 1
             if self.batch_bin_fitness_strategy == 'aggregate':
                 fit_per_batch.extend(bin_fitness) # ???
             else:
                 acc = []
-                tmp = [list(a) for a in zip(*bin_fitness)] if multi else bin_fitness
+                tmp = [list(a) for a in zip(*bin_fitness)]
                 for a in tmp: # a_k = fitness values per instance for fitness k
                     if len(a) == 1: # single instance
                         v = a[0]
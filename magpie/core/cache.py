@@ -0,0 +1,128 @@
+import collections
+import sys
+
+
+class LRUCache:
+    def __init__(self, maxsize=0, keep=0.2, pinned=('',)):
+        self.maxsize = maxsize # 0: unbounded
+        self.keep = keep # fraction of maxsize kept after eviction
+        self.pinned = {} # never evicted
+        self.pinned_keys = set(pinned)
+        self.data = collections.OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.pinned or key in self.data
+
+    def __len__(self):
+        return len(self.pinned) + len(self.data)
+
+    def items(self):
+        yield from self.pinned.items()
+        yield from self.data.items()
+
+    def get(self, key, default=None):
+        if key in self.pinned:
+            return self.pinned[key]
+        try:
+            self.data.move_to_end(key)
+        except KeyError:
+            return default
+        return self.data[key]
+
+    def set(self, key, value):
+        if key in self.pinned_keys:
+            self.pinned[key] = value
+            return
+        size = self.footprint(value)
+        if key not in self.data and self.is_full(size):
+            # evict in batches, to amortise eviction costs
+            while self.data and self.is_full(size, self.keep):
+                self.evict()
+        self.insert(key, value, size)
+
+    def is_full(self, size, ratio=1):
+        return 0 < self.maxsize and int(self.maxsize*ratio) < len(self.data) + size
+
+    def insert(self, key, value, size):
+        self.data[key] = value
+        self.data.move_to_end(key)
+
+    def evict(self):
+        self.data.popitem(last=False)
+
+    @staticmethod
+    def footprint(value):
+        return 1
+
+
+class LFUCache(LRUCache):
+    def __init__(self, maxsize=0, keep=0.2, pinned=('',)):
+        super().__init__(maxsize, keep, pinned)
+        self.data = {}
+        self.freqs = {} # key -> number of hits
+        self.buckets = {} # number of hits -> keys (in insertion order)
+        self.min_freq = 0
+
+    def get(self, key, default=None):
+        if key in self.pinned:
+            return self.pinned[key]
+        try:
+            value = self.data[key]
+        except KeyError:
+            return default
+        freq = self.freqs[key]
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        self.freqs[key] = freq + 1
+        self.buckets.setdefault(freq + 1, {})[key] = None
+        return value
+
+    def insert(self, key, value, size):
+        if key not in self.data:
+            self.freqs[key] = 0
+            self.buckets.setdefault(0, {})[key] = None
+            self.min_freq = 0
+        self.data[key] = value
+
+    def evict(self):
+        bucket = self.buckets[self.min_freq]
+        key = next(iter(bucket))
+        del bucket[key]
+        if not bucket:
+            del self.buckets[self.min_freq]
+            if self.buckets:
+                self.min_freq = min(self.buckets)
+        del self.freqs[key]
+        del self.data[key]
+
+
+class SizeCache(LRUCache):
+    # maxsize is expressed in bytes (estimated memory footprint of run results)
+    def __init__(self, maxsize=0, keep=0.2, pinned=('',)):
+        super().__init__(maxsize, keep, pinned)
+        self.sizes = {}
+        self.total_size = 0
+
+    def is_full(self, size, ratio=1):
+        return 0 < self.maxsize and int(self.maxsize*ratio) < self.total_size + size
+
+    def insert(self, key, value, size):
+        self.total_size += size - self.sizes.get(key, 0)
+        self.sizes[key] = size
+        super().insert(key, value, size)
+
+    def evict(self):
+        key, _ = self.data.popitem(last=False)
+        self.total_size -= self.sizes.pop(key)
+
+    @staticmethod
+    def footprint(value):
+        size = sys.getsizeof(value) + sys.getsizeof(value.cache) + sys.getsizeof(value.log or '')
+        size += sum(sys.getsizeof(inst) + sys.getsizeof(v) for inst, v in value.cache.items())
+        if (exec_result := value.last_exec) is not None:
+            size += sys.getsizeof(exec_result.stdout) + sys.getsizeof(exec_result.stderr)
+        return size
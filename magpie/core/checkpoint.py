@@ -0,0 +1,27 @@
+import io
+import os
+import pathlib
+import pickle
+
+from .patch import Patch
+
+
+class CheckpointPickler(pickle.Pickler):
+    # patches are saved as strings (templated edit classes are created on the fly)
+    def reducer_override(self, obj):
+        if isinstance(obj, Patch):
+            return (Patch.from_string, (str(obj),))
+        return NotImplemented
+
+
+def save_checkpoint(filename, data):
+    with io.BytesIO() as buffer:
+        CheckpointPickler(buffer).dump(data)
+        tmp = pathlib.Path(f'{filename}.tmp')
+        tmp.write_bytes(buffer.getvalue())
+    # atomic: a crash while saving never corrupts the previous checkpoint
+    os.replace(tmp, filename)
+
+def load_checkpoint(filename):
+    with pathlib.Path(filename).open('rb') as checkpoint_file:
+        return pickle.load(checkpoint_file)
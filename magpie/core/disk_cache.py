@@ -0,0 +1,57 @@
+import contextlib
+import hashlib
+import json
+import pathlib
+import sqlite3
+
+from .runresult import RunResult
+
+
+class DiskCache:
+    def __init__(self, filename, scope):
+        # scope: identifies the scenario (config and original software) results are valid for
+        self.filename = pathlib.Path(filename)
+        self.scope = hashlib.sha256(scope.encode()).hexdigest()
+        self.connection = None
+
+    def open(self):
+        with contextlib.suppress(FileExistsError):
+            self.filename.parent.mkdir(parents=True)
+        self.connection = sqlite3.connect(self.filename, timeout=60)
+        with self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS variants'
+                                    ' (scope TEXT, variant TEXT, status TEXT, fitness TEXT,'
+                                    ' PRIMARY KEY (scope, variant))')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS instances'
+                                    ' (scope TEXT, variant TEXT, inst TEXT, status TEXT, fitness TEXT,'
+                                    ' PRIMARY KEY (scope, variant, inst))')
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def get(self, key):
+        if self.connection is None:
+            self.open()
+        row = self.connection.execute('SELECT status, fitness FROM variants WHERE scope = ? AND variant = ?',
+                                      (self.scope, key)).fetchone()
+        if row is None:
+            return None
+        run = RunResult(None, row[0])
+        run.fitness = json.loads(row[1])
+        for inst, status, fitness in self.connection.execute('SELECT inst, status, fitness FROM instances WHERE scope = ? AND variant = ?',
+                                                             (self.scope, key)):
+            run.cache[inst] = (status, json.loads(fitness))
+        return run
+
+    def set(self, key, run):
+        if self.connection is None:
+            self.open()
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO variants VALUES (?, ?, ?, ?)',
+                                    (self.scope, key, run.status, json.dumps(run.fitness)))
+            self.connection.executemany('INSERT OR REPLACE INTO instances VALUES (?, ?, ?, ?, ?)',
+                                        [(self.scope, key, inst, status, json.dumps(fitness))
+                                         for inst, (status, fitness) in run.cache.items()])
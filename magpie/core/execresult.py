@@ -2,7 +2,7 @@ import types
 
 
 class ExecResult(types.SimpleNamespace):
-    def __init__(self, cmd, status, return_code, stdout, stderr, runtime, output_length):
+    def __init__(self, cmd, status, return_code, stdout, stderr, runtime, output_length, rusage=None):
         self.cmd = cmd
         self.status = status
         self.return_code = return_code
@@ -10,3 +10,8 @@ class ExecResult(types.SimpleNamespace):
         self.stderr = stderr
         self.runtime = runtime
         self.output_length = output_length
+        self.rusage = rusage # resource usage of the process, as reported by wait4 (if available)
+
+    def __reduce__(self):
+        # required by pickle (e.g., for parallel evaluation)
+        return (self.__class__.__new__, (self.__class__,), self.__dict__)
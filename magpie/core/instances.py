@@ -0,0 +1,93 @@
+import array
+import bisect
+import mmap
+import pathlib
+import random
+
+
+class InstanceFile:
+    # line-indexed view of an instance file: only offsets are kept in memory
+    def __init__(self, filename):
+        self.filename = pathlib.Path(filename)
+        self.offsets = array.array('q')
+        self.mapping = None
+        offset = 0
+        with self.filename.open('rb') as bin_file:
+            for line in bin_file:
+                tmp = line.strip()
+                if tmp and tmp[0] != ord('#'):
+                    self.offsets.append(offset)
+                offset += len(line)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        if self.mapping is None:
+            with self.filename.open('rb') as bin_file:
+                self.mapping = mmap.mmap(bin_file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = self.offsets[index]
+        end = self.mapping.find(b'\n', start)
+        if end == -1:
+            end = len(self.mapping)
+        return self.mapping[start:end].decode().strip()
+
+    def __getstate__(self):
+        # required by pickle (mmap objects are not picklable)
+        state = self.__dict__.copy()
+        state['mapping'] = None
+        return state
+
+
+class InstanceBin:
+    # lazy sequence of instances from literal strings and instance files
+    def __init__(self):
+        self.sources = []
+        self.starts = []
+        self.size = 0
+        self.permutation = None # None: original order
+        self.drawn = 0
+
+    def append(self, instance):
+        if self.sources and isinstance(self.sources[-1], list):
+            self.sources[-1].append(instance)
+        else:
+            self.starts.append(self.size)
+            self.sources.append([instance])
+        self.size += 1
+
+    def extend_from_file(self, filename):
+        source = InstanceFile(filename)
+        if len(source) > 0:
+            self.starts.append(self.size)
+            self.sources.append(source)
+            self.size += len(source)
+
+    def shuffle(self):
+        # restarts a lazy Fisher-Yates shuffle: positions are only drawn when accessed
+        self.permutation = {}
+        self.drawn = 0
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        if self.permutation is not None:
+            while self.drawn <= index:
+                j = random.randrange(self.drawn, self.size)
+                tmp = self.permutation.get(j, j)
+                self.permutation[j] = self.permutation.get(self.drawn, self.drawn)
+                self.permutation[self.drawn] = tmp
+                self.drawn += 1
+            index = self.permutation[index]
+        k = bisect.bisect_right(self.starts, index) - 1
+        return self.sources[k][index - self.starts[k]]
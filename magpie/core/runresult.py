@@ -11,3 +11,8 @@ class RunResult(types.SimpleNamespace):
         self.last_exec = None
         self.cached = False
         self.updated = False
+        self.timings = {} # seconds spent in each phase of the evaluation
+
+    def __reduce__(self):
+        # required by pickle (e.g., for parallel evaluation)
+        return (self.__class__.__new__, (self.__class__,), self.__dict__)
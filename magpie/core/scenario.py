@@ -8,11 +8,16 @@ default_scenario = {
         'local_original_copy': False,
         'local_original_name': '__original__',
         'output_encoding': 'ascii',
+        'workers': 1,
+        'sync_mode': 'full', # full ; manifest
+        'work_backend': 'copy', # copy ; hardlink ; tmpfs
+        'tmpfs_dir': '/dev/shm',
         'edit_retries': 10,
         'default_timeout': 30,
         'default_lengthout': 1e4,
         'diff_method': 'unified',
         'trust_local_filesystem': True,
+        'profile': False,
     },
 
     # [magpie.log] section
@@ -47,6 +52,7 @@ default_scenario = {
         'compile_cmd': '',
         'compile_timeout': '',
         'compile_lengthout': '',
+        'artifacts': '',
         'test_cmd': '',
         'test_timeout': '',
         'test_lengthout': '',
@@ -55,8 +61,11 @@ default_scenario = {
         'run_lengthout': '',
         'batch_timeout': '',
         'batch_lengthout': '',
+        'batch_workers': 1,
         'batch_bin_fitness_strategy': 'aggregate', # aggregate ; sum ; average ; median ; q10 ; q25 ; q75 ; q90
         'batch_fitness_strategy': 'sum', # sum ; average ; median
+        'batch_racing': '', # bound ; sign
+        'batch_racing_alpha': 0.05,
     },
 
     # [srcml] section
@@ -94,8 +103,16 @@ number: literal_number""",
         'max_steps': '',
         'max_time': '',
         'target_fitness': '',
-        'cache_maxsize': 100,
+        'cache_maxsize': 100, # number of run results (in kB with the size policy)
         'cache_keep': 0.2,
+        'cache_policy': 'lfu', # lfu ; lru ; size
+        'cache_file': '',
+        'checkpoint_interval': '',
+        'edit_selection': 'uniform', # uniform ; ucb ; thompson
+        'surrogate': '', # naive_bayes
+        'surrogate_threshold': 0.9,
+        'surrogate_warmup': 20,
+        'surrogate_explore': 0.1,
         'batch_instances': '', # separated by "|" see also "file:"
         'batch_shuffle': True,
         'batch_bin_shuffle': False,
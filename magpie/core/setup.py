@@ -40,6 +40,24 @@ def setup(config):
         raise ScenarioError(msg)
     magpie.settings.local_original_copy = sec['local_original_name']
     magpie.settings.output_encoding = sec['output_encoding']
+    magpie.settings.workers = int(sec['workers'])
+    if magpie.settings.workers < 1:
+        msg = '[magpie] workers should be a positive integer'
+        raise ScenarioError(msg)
+    magpie.settings.sync_mode = sec['sync_mode']
+    if magpie.settings.sync_mode not in ['full', 'manifest']:
+        msg = '[magpie] sync_mode should be either "full" or "manifest"'
+        raise ScenarioError(msg)
+    magpie.settings.work_backend = sec['work_backend']
+    if magpie.settings.work_backend not in ['copy', 'hardlink', 'tmpfs']:
+        msg = '[magpie] work_backend should be either "copy", "hardlink", or "tmpfs"'
+        raise ScenarioError(msg)
+    if magpie.settings.work_backend == 'tmpfs':
+        tmpfs_dir = pathlib.Path(sec['tmpfs_dir'])
+        if not tmpfs_dir.is_dir():
+            msg = f'[magpie] tmpfs_dir "{tmpfs_dir}" is not a directory'
+            raise ScenarioError(msg)
+        magpie.settings.work_dir = str(tmpfs_dir / pathlib.Path(sec['work_dir']).name)
     magpie.settings.edit_retries = int(sec['edit_retries'])
     magpie.settings.default_timeout = float(sec['default_timeout'])
     magpie.settings.default_lengthout = int(float(sec['default_lengthout']))
@@ -52,6 +70,14 @@ def setup(config):
     else:
         msg = '[magpie] trust_local_filesystem should be Boolean'
         raise ScenarioError(msg)
+    val = sec['profile'].lower()
+    if val in ['true', 't', '1']:
+        magpie.settings.profile = True
+    elif val in ['false', 'f', '0']:
+        magpie.settings.profile = False
+    else:
+        msg = '[magpie] profile should be Boolean'
+        raise ScenarioError(msg)
 
     # [magpie.log] section
     sec = config['magpie.log']
@@ -64,13 +90,13 @@ def setup(config):
         msg = '[magpie.log] color_output should be Boolean'
         raise ScenarioError(msg)
     try:
-        sec['format_info'].format(counter='', status='', best='', fitness='', ratio='', size='', cached='', log='', patch='', patchifaccept='', patchifbest='', diff='', diffifaccept='', diffifbest='')
+        sec['format_info'].format(counter='', status='', best='', fitness='', ratio='', size='', cached='', log='', patch='', patchifaccept='', patchifbest='', diff='', diffifaccept='', diffifbest='', timings='')
     except KeyError as e:
         msg = '[magpie.log] error in format_info format string'
         raise ScenarioError(msg) from e
     magpie.settings.log_format_info = sec['format_info']
     try:
-        sec['format_debug'].format(counter='', status='', best='', rawfitness='', fitness='', ratio='', size='', cached='', log='', patch='', patchifaccept='', patchifbest='', diff='', diffifaccept='', diffifbest='')
+        sec['format_debug'].format(counter='', status='', best='', rawfitness='', fitness='', ratio='', size='', cached='', log='', patch='', patchifaccept='', patchifbest='', diff='', diffifaccept='', diffifbest='', timings='')
     except KeyError as e:
         msg = '[magpie.log] error in format_debug format string'
         raise ScenarioError(msg) from e
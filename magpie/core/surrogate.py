@@ -0,0 +1,57 @@
+import math
+
+
+class NaiveBayesSurrogate:
+    # online naive Bayes classifier of patches, learning whether they fail to compile/test/run from their edits
+    def __init__(self):
+        self.runs = {False: 0, True: 0} # per label (i.e., whether the patch failed)
+        self.counts = {False: {}, True: {}} # per label, per feature
+        self.totals = {False: 0, True: 0} # per label
+        self.vocabulary = set()
+
+    @property
+    def observations(self):
+        return self.runs[False] + self.runs[True]
+
+    @staticmethod
+    def features(patch):
+        # edit type, edit type and target type, edit type and exact location (and ingredient, if any)
+        features = []
+        for edit in patch.edits:
+            name = edit.__class__.__name__
+            features.append(name)
+            if isinstance(edit.target, tuple) and len(edit.target) == 3:
+                features.append(f'{name}@{edit.target[0]}:{edit.target[1]}')
+            features.append(f'{name}@{edit.target!r}')
+            if edit.data and isinstance(edit.data[0], tuple):
+                features.append(f'{name}<{edit.data[0]!r}')
+        return features
+
+    @staticmethod
+    def label(status):
+        # whether the status is a failure, or None if it says nothing about the validity of the patch
+        if status == 'SUCCESS':
+            return False
+        if status.split('_')[0] in ['SETUP', 'COMPILE', 'TEST', 'RUN']:
+            return True
+        return None
+
+    def observe(self, patch, status):
+        if (failed := self.label(status)) is None:
+            return
+        self.runs[failed] += 1
+        for feature in self.features(patch):
+            self.counts[failed][feature] = self.counts[failed].get(feature, 0) + 1
+            self.totals[failed] += 1
+            self.vocabulary.add(feature)
+
+    def predict(self, patch):
+        # probability that the patch fails (with Laplace smoothing)
+        v = len(self.vocabulary) + 1
+        log_odds = math.log((self.runs[True] + 1) / (self.runs[False] + 1))
+        for feature in self.features(patch):
+            log_odds += math.log((self.counts[True].get(feature, 0) + 1) / (self.totals[True] + v))
+            log_odds -= math.log((self.counts[False].get(feature, 0) + 1) / (self.totals[False] + v))
+        if log_odds < 0:
+            return math.exp(log_odds) / (1 + math.exp(log_odds))
+        return 1 / (1 + math.exp(-log_odds))
@@ -0,0 +1,51 @@
+import contextlib
+import cProfile
+import time
+
+# objects with "enter(phase)" and "exit(phase, elapsed)" methods, called around every timed phase
+hooks = []
+
+# phases in which Magpie waits for external commands
+command_phases = {'setup', 'compile', 'test', 'run'}
+
+
+@contextlib.contextmanager
+def timed(timings, phase):
+    for hook in hooks:
+        hook.enter(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings[phase] = timings.get(phase, 0) + elapsed
+        for hook in reversed(hooks):
+            hook.exit(phase, elapsed)
+
+def merge_timings(timings, other):
+    for phase, elapsed in other.items():
+        timings[phase] = timings.get(phase, 0) + elapsed
+
+
+class CProfileHook:
+    # profiles Magpie's own overhead only (i.e., not external commands)
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.depth = 0
+
+    def enter(self, phase):
+        if phase in command_phases:
+            return
+        if self.depth == 0:
+            self.profile.enable()
+        self.depth += 1
+
+    def exit(self, phase, elapsed):
+        if phase in command_phases:
+            return
+        self.depth -= 1
+        if self.depth == 0:
+            self.profile.disable()
+
+    def dump(self, filename):
+        self.profile.dump_stats(filename)
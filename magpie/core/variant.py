@@ -1,28 +1,62 @@
 import contextlib
-import copy
 import difflib
+import functools
+import hashlib
 import random
 
 import magpie.settings
 import magpie.utils
 
+from .timing import timed
+
 
 class Variant:
     def __init__(self, software, patch=None):
         self.models = {}
+        self.timings = {} # not yet accounted for by the algorithm
         if software.noop_variant:
-            self.models = copy.deepcopy(software.noop_variant.models)
+            # copy-on-write: models are shared with the noop variant until targeted by an edit
+            self.models = dict(software.noop_variant.models)
         else:
             if patch is not None:
                 raise AssertionError
-            with contextlib.chdir(software.path):
+            with contextlib.chdir(software.path), timed(self.timings, 'variant'):
                 for filename in software.target_files:
                     self.models[filename] = self._init_model(software, filename)
+        self.reference = software.noop_variant or self
         self.patch = patch
         if patch:
-            for edit in patch.edits:
-                edit.apply(software.noop_variant, self)
-        self.diff = self._diff(software.noop_variant or self, magpie.settings.diff_method)
+            with timed(self.timings, 'variant'):
+                for edit in patch.edits:
+                    filename = edit.target[0]
+                    if self.models[filename] is software.noop_variant.models[filename]:
+                        self.models[filename] = self.models[filename].clone()
+                    edit.apply(software.noop_variant, self)
+
+    @functools.cached_property
+    def key(self):
+        with timed(self.timings, 'key'):
+            return self._key()
+
+    def _key(self):
+        # cheap identity: empty for variants identical to the reference, otherwise a digest of all modified files
+        h = hashlib.blake2b(digest_size=16)
+        modified = False
+        for filename, model in self.models.items():
+            if model is self.reference.models[filename]:
+                continue
+            dump = model.dump()
+            if dump == model.cached_dump:
+                continue
+            modified = True
+            h.update(filename.encode())
+            h.update(hashlib.blake2b(dump.encode()).digest())
+        return h.hexdigest() if modified else ''
+
+    @functools.cached_property
+    def diff(self):
+        # human-readable (and expensive) identity, only for logging and reports
+        return self._diff(self.reference, magpie.settings.diff_method)
 
     def random_model(self, klass):
         tmp = [model for model in self.models.values() if isinstance(model, klass)]
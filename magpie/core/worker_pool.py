@@ -0,0 +1,89 @@
+import concurrent.futures
+import copy
+import multiprocessing
+
+from .patch import Patch
+from .timing import merge_timings
+from .variant import Variant
+
+# software instance of the current worker process (only set in workers)
+_worker_software = None
+
+
+class WorkerPool:
+    def __init__(self, software, size=1):
+        self.software = software
+        self.size = size
+        self.executor = None
+
+    def submit(self, variant, cached_run=None):
+        if self.size <= 1:
+            return self.completed(self.software.evaluate_variant(variant, cached_run))
+        if self.executor is None:
+            self.start()
+            if self.executor is None:
+                return self.completed(self.software.evaluate_variant(variant, cached_run))
+
+        # variants (and their models) stay in the main process
+        if cached_run is not None:
+            cached_run = copy.copy(cached_run)
+            cached_run.variant = None
+        future = concurrent.futures.Future()
+        inner = self.executor.submit(_worker_evaluate, str(variant.patch), self.software.batch, self.software.race_reference, cached_run)
+
+        def callback(inner):
+            if inner.cancelled():
+                future.cancel()
+            elif (e := inner.exception()) is not None:
+                future.set_exception(e)
+            else:
+                run = inner.result()
+                run.variant = variant
+                future.set_result(run)
+        inner.add_done_callback(callback)
+        return future
+
+    @staticmethod
+    def completed(run):
+        future = concurrent.futures.Future()
+        future.set_result(run)
+        return future
+
+    def start(self):
+        try:
+            ctx = multiprocessing.get_context('fork')
+        except ValueError:
+            self.software.logger.warning('Parallel evaluation requires "fork" (falling back to a single worker)')
+            self.size = 1
+            return
+        worker_ids = ctx.Queue()
+        for k in range(self.size):
+            worker_ids.put(k)
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.size,
+                                                               mp_context=ctx,
+                                                               initializer=_worker_init,
+                                                               initargs=(self.software, worker_ids))
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+def _worker_init(software, worker_ids):
+    global _worker_software
+    software.pool = WorkerPool(software) # no nested pools
+    software.work_dir = software.work_dir / f'worker_{worker_ids.get()}'
+    _worker_software = software
+
+def _worker_evaluate(patch, batch, race_reference, cached_run):
+    software = _worker_software
+    software.batch = batch
+    software.race_reference = race_reference
+    variant = Variant(software, Patch.from_string(patch))
+    if cached_run is not None:
+        cached_run.variant = variant
+    run = software.evaluate_variant(variant, cached_run)
+    merge_timings(run.timings, variant.timings) # the variant is built again in the worker
+    run.variant = None
+    return run
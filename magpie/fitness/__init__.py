@@ -3,7 +3,9 @@ from .gnu_time import GnuTimeTemplatedFitness
 from .output import OutputFitness
 from .perf import PerfTemplatedFitness
 from .repair import RepairFitness
+from .rusage import RusageTemplatedFitness
 from .time import (
+    CpuTimeFitness,
     PerfInstructionsFitness,
     PerfTimeFitness,
     PosixTimeFitness,
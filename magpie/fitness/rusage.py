@@ -0,0 +1,23 @@
+import magpie.utils.known
+from magpie.core import TemplatedFitness
+
+
+class RusageTemplatedFitness(TemplatedFitness):
+    def __init__(self, software):
+        super().__init__(software)
+        assert len(self.TEMPLATE) == 1
+        self.key = self.TEMPLATE[0].lower().replace(' ', '')
+        if not self.key.startswith('ru_'):
+            self.key = f'ru_{self.key}'
+
+    def process_run_exec(self, run_result, exec_result):
+        super().process_run_exec(run_result, exec_result)
+        # use the resource usage reported by wait4 (POSIX only)
+        try:
+            value = getattr(exec_result.rusage, self.key)
+        except AttributeError:
+            run_result.status = 'PARSE_ERROR'
+            return
+        run_result.fitness = round(value, 4) if isinstance(value, float) else value
+
+magpie.utils.known.fitness.append(RusageTemplatedFitness)
@@ -53,3 +53,16 @@ class PerfInstructionsFitness(BasicFitness):
             run_result.status = 'PARSE_ERROR'
 
 magpie.utils.known.fitness.append(PerfInstructionsFitness)
+
+
+class CpuTimeFitness(BasicFitness):
+    def process_run_exec(self, run_result, exec_result):
+        super().process_run_exec(run_result, exec_result)
+        # use user+system time as reported by wait4 (POSIX only)
+        rusage = exec_result.rusage
+        if rusage is None:
+            run_result.status = 'PARSE_ERROR'
+            return
+        run_result.fitness = round(rusage.ru_utime + rusage.ru_stime, 4)
+
+magpie.utils.known.fitness.append(CpuTimeFitness)
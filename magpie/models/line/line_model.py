@@ -1,3 +1,5 @@
+import bisect
+import copy
 import pathlib
 
 import magpie.utils
@@ -6,6 +8,12 @@ from .abstract_model import AbstractLineModel
 
 
 class LineModel(AbstractLineModel):
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.current_dump = None # memoized until the next edit
+        self.chunk_starts = [0] # dumps are cached per range of lines
+        self.chunk_dumps = [None]
+
     def init_contents(self):
         with pathlib.Path(self.filename).open('r') as target_file:
             lines = list(map(str.rstrip, target_file.readlines()))
@@ -16,9 +24,35 @@ class LineModel(AbstractLineModel):
             'line': list(range(n)),
             '_inter_line': list(range(n+1)),
         }
+        self.current_dump = None
+        self.chunk_starts = list(range(0, max(n, 1), _DUMP_CHUNK_SIZE))
+        self.chunk_dumps = [None]*len(self.chunk_starts)
 
     def dump(self):
-        return ''.join(s + '\n' for s in self.contents if s is not None)
+        if self.current_dump is None:
+            ends = [*self.chunk_starts[1:], len(self.contents)]
+            for k, chunk in enumerate(self.chunk_dumps):
+                if chunk is None:
+                    lines = self.contents[self.chunk_starts[k]:ends[k]]
+                    self.chunk_dumps[k] = ''.join(s + '\n' for s in lines if s is not None)
+            self.current_dump = ''.join(self.chunk_dumps)
+        return self.current_dump
+
+    def clone(self):
+        model = copy.copy(self)
+        model.contents = self.contents[:]
+        model.locations = {k: v[:] for k, v in self.locations.items()}
+        model.chunk_starts = self.chunk_starts[:]
+        model.chunk_dumps = self.chunk_dumps[:]
+        return model
+
+    def invalidate_dump(self, index, inserted=False):
+        k = bisect.bisect_right(self.chunk_starts, index) - 1
+        self.chunk_dumps[k] = None
+        if inserted:
+            for j in range(k+1, len(self.chunk_starts)):
+                self.chunk_starts[j] += 1
+        self.current_dump = None
 
     def show_location(self, target_type, target_loc):
         tag_start = ''
@@ -48,6 +82,7 @@ class LineModel(AbstractLineModel):
             new_line == old_line):
             return False
         self.contents[self.locations[d_t][d_i]] = new_line
+        self.invalidate_dump(self.locations[d_t][d_i])
         return True
 
     def do_insert(self, ref_model, target_dest, target_orig):
@@ -60,6 +95,7 @@ class LineModel(AbstractLineModel):
             raise ValueError
         new_line = ref_model.contents[ref_model.locations[o_t][o_i]]
         self.contents.insert(self.locations[d_t][d_i], new_line)
+        self.invalidate_dump(self.locations[d_t][d_i], inserted=True)
         # fix locations
         for i in range(d_i, len(self.locations['line'])):
             self.locations['line'][i] += 1
@@ -76,6 +112,9 @@ class LineModel(AbstractLineModel):
         if old_line is None:
             return False
         self.contents[self.locations[d_t][d_i]] = None
+        self.invalidate_dump(self.locations[d_t][d_i])
         return True
 
 magpie.utils.known_models.append(LineModel)
+
+_DUMP_CHUNK_SIZE = 256 # lines
@@ -14,6 +14,8 @@ class XmlModel(AbstractXmlModel):
         self.config = {
             'internodes': [],
         }
+        self.current_dump = None # memoized until the next edit
+        self.texts = {} # cached text of small subtrees
 
     def setup(self, config, section_name):
         super().setup(config, section_name)
@@ -26,35 +28,86 @@ class XmlModel(AbstractXmlModel):
             tree = self.string_to_tree(target_file.read())
         self.contents = self.process_tree(tree)
 
-        def aux(accu, prefix, root):
+        # node table: node id -> element, parent node id, end of its (preorder) subtree, and indentation
+        self.nodes = []
+        self.parents = []
+        self.subtree_ends = []
+        self.indents = []
+        self.locations = {}
+
+        def aux(root, parent, indent):
+            node = len(self.nodes)
+            self.nodes.append(root)
+            self.parents.append(parent)
+            self.subtree_ends.append(None)
+            self.indents.append(indent)
+            if parent is not None:
+                self.locations.setdefault(root.tag, []).append(node)
+            inter = None
             if not self.config['internodes'] or root.tag in self.config['internodes']:
                 if len(root) > 0: # can't deal with <block>{}</block>
-                    for i in range(len(root)+1):
-                        s = f'{prefix}><{i}' # "><" is safe because illegal
-                        try:
-                            accu[f'_inter_{root.tag}'].append(s)
-                        except KeyError:
-                            accu[f'_inter_{root.tag}'] = [s]
-            tags = {}
+                    inter = self.locations.setdefault(f'_inter_{root.tag}', [])
+                    pos = len(inter)
+                    inter.extend([None]*(len(root)+1))
+            children = []
+            seen_tags = set()
+            lead = None
             for child in root:
-                if child.tag in tags:
-                    tags[child.tag] += 1
-                else:
-                    tags[child.tag] = 1
-                s = f'{prefix}/{child.tag}[{tags[child.tag]}]'
-                try:
-                    accu[child.tag].append(s)
-                except KeyError:
-                    accu[child.tag] = [s]
-                accu = aux(accu, s, child)
-            return accu
-        self.locations = aux({}, '.', tree)
+                if child.tag not in seen_tags:
+                    lead = root.text
+                    seen_tags.add(child.tag)
+                children.append(aux(child, node, self.lead_indent(node, lead)))
+                lead = child.tail
+            if inter is not None:
+                # insertion points: before a given child, or at the end (None)
+                inter[pos:pos+len(root)+1] = [(node, anchor) for anchor in [*children, None]]
+            self.subtree_ends[node] = len(self.nodes)
+            return node
+        aux(tree, None, '')
+        self.current_dump = None
+        self.texts = {}
 
     def process_tree(self, tree):
         return tree
 
     def dump(self):
-        return self.strip_xml_from_tree(self.contents)
+        if self.current_dump is None:
+            self.current_dump = self.node_text(0)
+        return self.current_dump
+
+    def node_text(self, node):
+        # same as strip_xml_from_tree, reusing cached text for subtrees untouched by edits
+        element = self.nodes[node]
+        end = self.subtree_ends[node]
+        if end - node <= _DUMP_CHUNK_SIZE:
+            if (text := self.texts.get(node)) is None:
+                text = self.texts[node] = self.strip_xml_from_tree(element)
+            return text
+        parts = [element.text or '']
+        child_node = node + 1
+        for child in element:
+            if child_node < end and child is self.nodes[child_node]:
+                parts.append(self.node_text(child_node))
+                child_node = self.subtree_ends[child_node]
+            else: # inserted by an edit
+                parts.append(self.strip_xml_from_tree(child))
+            parts.append(child.tail or '')
+        return ''.join(parts)
+
+    def invalidate_dump(self, node):
+        # only small subtrees are cached: drop the one containing the node (if any)
+        while node is not None and self.subtree_ends[node] - node <= _DUMP_CHUNK_SIZE:
+            self.texts.pop(node, None)
+            node = self.parents[node]
+        self.current_dump = None
+
+    def clone(self):
+        model = copy.copy(self)
+        model.contents, model.nodes = copy.deepcopy((self.contents, self.nodes))
+        model.locations = {k: v[:] for k, v in self.locations.items()}
+        model.indents = self.indents[:]
+        model.texts = self.texts.copy()
+        return model
 
     def show_location(self, target_type, target_loc):
         insert = '(INSERTION POINT)'
@@ -67,30 +120,25 @@ class XmlModel(AbstractXmlModel):
             tag_middle = f'{tag_middle}\033[34m'
             tag_end = f'{tag_end}\033[0m'
         if target_type[:7] == '_inter_':
-            fakepath = self.locations[target_type][target_loc]
-            parent_xpath, insert_index = fakepath.split('><')
-            insert_index = int(insert_index)
-            parent = copy.deepcopy(self.contents.find(parent_xpath))
-            sp = self.find_indent(parent_xpath)
+            parent_node, anchor = self.locations[target_type][target_loc]
+            parent_xpath = self.node_xpath(parent_node)
+            insert_index = self.insert_index(parent_node, anchor)
+            fakepath = f'{parent_xpath}><{insert_index}' # "><" is safe because illegal
+            parent = copy.deepcopy(self.nodes[parent_node])
+            sp = self.find_indent(parent_node)
             if insert_index == 0:
                 parent.text = f'{parent.text or ""}\n{insert}\n{sp}'
             else:
-                child = None
-                tmp = {child.tag: 0 for child in parent}
-                for i, child in enumerate(parent):
-                    tmp[child.tag] += 1
-                    if i == insert_index-1:
-                        child_xpath = f'{parent_xpath}/{child.tag}[{tmp[child.tag]}]'
-                        spc = self.find_indent(child_xpath)
-                        child.tail = f'\n{spc}{insert}{child.tail or ""}'
-                        break
+                spc = self.child_indent(parent_node, self.nodes[parent_node][insert_index-1])
+                child = parent[insert_index-1]
+                child.tail = f'\n{spc}{insert}{child.tail or ""}'
             tmp = self.tree_to_string(parent)
             return f'{tag_start}{target_loc}{tag_middle}{fakepath}{tag_end}{sp}{tmp}'
         # default: non '_inter_' tag
-        xpath = self.locations[target_type][target_loc]
-        sp = self.find_indent(xpath)
-        tmp = self.tree_to_string(self.contents.find(xpath), keep_tail=False)
-        return f'{tag_start}{target_loc}{tag_middle}{xpath}{tag_end}{sp}{tmp}'
+        node = self.locations[target_type][target_loc]
+        sp = self.find_indent(node)
+        tmp = self.tree_to_string(self.nodes[node], keep_tail=False)
+        return f'{tag_start}{target_loc}{tag_middle}{self.node_xpath(node)}{tag_end}{sp}{tmp}'
 
     @staticmethod
     def string_to_tree(xml_str):
@@ -111,45 +159,63 @@ class XmlModel(AbstractXmlModel):
     def strip_xml_from_tree(tree):
         return ''.join(tree.itertext())
 
-    @staticmethod
-    def split_xpath(xpath, prefix=None):
-        if xpath == '.':
-            raise ValueError
-        if prefix is None:
-            pattern = re.compile(r'^(.*)/([^\[]+)(?:\[([^\]]+)\])?$')
-            match = re.match(pattern, xpath)
-            if match is None:
-                raise LookupError
-            return (match.group(1), match.group(2), int(match.group(3)), None)
-        if xpath[:len(prefix)+1] == prefix+'/':
-            pattern = re.compile(r'^/([^\[]+)(?:\[([^\]]+)\])?(?:/(.*))?$')
-            match = re.match(pattern, xpath[len(prefix):])
-            if match is None:
-                raise LookupError
-            return (prefix, match.group(1), int(match.group(2)), match.group(3))
-        return (None, None, None, None)
+    def node_xpath(self, node):
+        # only used for display
+        parent = self.parents[node]
+        if parent is None:
+            return '.'
+        target = self.nodes[node]
+        if target is None:
+            return 'deleted'
+        index = 0
+        for child in self.nodes[parent]:
+            if child.tag == target.tag:
+                index += 1
+            if child is target:
+                break
+        return f'{self.node_xpath(parent)}/{target.tag}[{index}]'
+
+    def child_index(self, parent, node):
+        target = self.nodes[node]
+        for i, child in enumerate(self.nodes[parent]):
+            if child is target:
+                return i
+        raise LookupError
+
+    def insert_index(self, parent, anchor):
+        if anchor is None:
+            return len(self.nodes[parent])
+        return self.child_index(parent, anchor)
+
+    def detach_subtree(self, node):
+        # descendants are about to be removed from the tree
+        for i in range(node+1, self.subtree_ends[node]):
+            self.nodes[i] = None
 
     def do_replace(self, ref_model, target_dest, target_orig):
         # get elements
-        d_f, d_t, d_i = target_dest # file name, tag, xpath index
-        o_f, o_t, o_i = target_orig # file name, tag, xpath index
+        d_f, d_t, d_i = target_dest # file name, tag, node index
+        o_f, o_t, o_i = target_orig # file name, tag, node index
         if (d_f != self.filename or
             o_f != ref_model.filename):
             raise ValueError
-        target = self.contents.find(self.locations[d_t][d_i])
-        ingredient = ref_model.contents.find(ref_model.locations[o_t][o_i])
+        target_node = self.locations[d_t][d_i]
+        ingredient_node = ref_model.locations[o_t][o_i]
+        target = self.nodes[target_node]
+        ingredient = ref_model.nodes[ingredient_node]
         if target is None or ingredient is None:
             return False
         if self.tree_to_string(target, keep_tail=False) == self.tree_to_string(ingredient, keep_tail=False):
             return False
 
         # lookup indentations
-        ind_t = self.find_indent(self.locations[d_t][d_i])
-        ind_i = ref_model.find_indent(ref_model.locations[o_t][o_i])
+        ind_t = self.find_indent(target_node)
+        ind_i = ref_model.find_indent(ingredient_node)
 
         # mutate
         old_tag = target.tag
         old_tail = target.tail
+        self.detach_subtree(target_node)
         target.clear() # to remove children
         target.tag = ingredient.tag
         target.attrib = ingredient.attrib
@@ -158,109 +224,58 @@ class XmlModel(AbstractXmlModel):
         for child in ingredient:
             target.append(copy.deepcopy(child))
         self.replace_indent(target, ind_t, ind_i)
-
-        # update modification points
-        if old_tag != ingredient.tag:
-            head, tag, pos, _ = self.split_xpath(self.locations[d_t][d_i])
-            itag = 1
-            for i, xpath in enumerate(self.locations[d_t]):
-                h, t, p, s = self.split_xpath(xpath, head)
-                if i < d_i:
-                    if h != head:
-                        continue
-                    if t == ingredient.tag:
-                        itag += 1
-                elif i == d_i:
-                    self.locations[d_t][i] = f'{h}/{ingredient.tag}[{itag}]'
-                elif h != head:
-                    break
-                elif t == tag:
-                    if p == pos:
-                        new_pos = 'deleted'
-                    elif s:
-                        new_pos = f'{h}/{t}[{p-1}]/{s}'
-                    else:
-                        new_pos = f'{h}/{t}[{p-1}]'
-                    self.locations[d_t][i] = new_pos
-                elif t == ingredient.tag:
-                    if s:
-                        new_pos = f'{h}/{t}[{p+1}]/{s}'
-                    else:
-                        new_pos = f'{h}/{t}[{p+1}]'
-                    self.locations[o_t][i] = new_pos
-        xpath = self.locations[d_t][d_i]
-        for i, xpath_inter in enumerate(self.locations[d_t]):
-            if xpath_inter > xpath and xpath_inter[:len(xpath)] == xpath:
-                self.locations[d_t][i] = 'deleted'
+        if ingredient.tag != old_tag:
+            self.update_indents(self.parents[target_node])
+        self.invalidate_dump(target_node)
         return True
 
     def do_insert(self, ref_model, target_dest, target_orig):
         # get elements
-        d_f, d_t, d_i = target_dest # file name, tag, xpath index
-        o_f, o_t, o_i = target_orig # file name, tag, xpath index
+        d_f, d_t, d_i = target_dest # file name, tag, node index
+        o_f, o_t, o_i = target_orig # file name, tag, node index
         if (d_f != self.filename or
             o_f != ref_model.filename):
             raise ValueError
-        parent_xpath, insert_index = self.locations[d_t][d_i].split('><')
-        insert_index = int(insert_index)
-        parent = self.contents.find(parent_xpath)
-        ingredient = ref_model.contents.find(ref_model.locations[o_t][o_i])
+        parent_node, anchor = self.locations[d_t][d_i]
+        ingredient_node = ref_model.locations[o_t][o_i]
+        parent = self.nodes[parent_node]
+        ingredient = ref_model.nodes[ingredient_node]
         if parent is None or ingredient is None:
             return False
+        if anchor is None:
+            if len(parent) == 0: # children were deleted
+                return False
+            insert_index = len(parent)
+        elif self.nodes[anchor] is None:
+            return False
+        else:
+            insert_index = self.child_index(parent_node, anchor)
 
         # lookup indentations
-        for child in parent:
-            ind_t = self.find_indent(f'{parent_xpath}/{child.tag}[1]')
-            break
-        else:
-            ind_t = '  ' # no idea?!
-        ind_i = ref_model.find_indent(ref_model.locations[o_t][o_i])
+        ind_t = self.lead_indent(parent_node, parent.text)
+        ind_i = ref_model.find_indent(ingredient_node)
 
         # mutate
         tmp = copy.deepcopy(ingredient)
         if insert_index == 0:
             tmp.tail = f'\n{ind_t}'
-            parent.insert(insert_index, tmp)
         else:
-            child = None
-            for i, child in enumerate(parent):
-                if i == insert_index-1:
-                    tmp.tail = child.tail
-                    child.tail = f'\n{ind_t}'
-                    parent.insert(insert_index, tmp)
-                    break
-            else:
-                tmp.tail = child.tail
-                child.tail = f'\n{ind_t}'
-                parent.insert(i+1, tmp)
+            child = parent[insert_index-1]
+            tmp.tail = child.tail
+            child.tail = f'\n{ind_t}'
+        parent.insert(insert_index, tmp)
         self.replace_indent(tmp, ind_t, ind_i)
-
-        # update modification points
-        for i, xpath in enumerate(self.locations[o_t]):
-            if xpath == 'deleted':
-                continue
-            h, t, p, s = self.split_xpath(xpath, parent_xpath)
-            if h != parent_xpath or t != ingredient.tag or p < insert_index:
-                continue
-            if s:
-                new_pos = f'{h}/{t}[{p+1}]/{s}'
-            else:
-                new_pos = f'{h}/{t}[{p+1}]'
-            self.locations[o_t][i] = new_pos
-        for i, xpath_inter in enumerate(self.locations[d_t]):
-            xpath, index = xpath_inter.split('><')
-            index = int(index)
-            if xpath != parent_xpath or index < insert_index:
-                continue
-            self.locations[d_t][i] = f'{xpath}><{index+1}'
+        self.update_indents(parent_node)
+        self.invalidate_dump(parent_node)
         return True
 
     def do_delete(self, target):
         # get elements
-        d_f, d_t, d_i = target # file name, tag, xpath index
+        d_f, d_t, d_i = target # file name, tag, node index
         if d_f != self.filename:
             raise ValueError
-        target = self.contents.find(self.locations[d_t][d_i])
+        target_node = self.locations[d_t][d_i]
+        target = self.nodes[target_node]
         if target is None:
             return False
         if len(target) == 0 and target.text is None: # (probably) already deleted
@@ -269,60 +284,74 @@ class XmlModel(AbstractXmlModel):
         # mutate
         old_tag = target.tag
         old_tail = target.tail
+        self.detach_subtree(target_node)
         target.clear() # to remove children
         target.tag = old_tag
         target.tail = old_tail
+        self.invalidate_dump(target_node)
         return True
 
     def do_set_text(self, target, value):
-        d_f, d_t, d_i = target # file name, tag, xpath index
+        d_f, d_t, d_i = target # file name, tag, node index
         if d_f != self.filename:
             raise ValueError
-        target = self.contents.find(self.locations[d_t][d_i])
+        target_node = self.locations[d_t][d_i]
+        target = self.nodes[target_node]
         if target is None or target.text == value:
             return False
         target.text = value
+        self.update_indents(target_node)
+        self.invalidate_dump(target_node)
         return True
 
     def do_wrap_text(self, target, prefix, suffix):
-        d_f, d_t, d_i = target # file name, tag, xpath index
+        d_f, d_t, d_i = target # file name, tag, node index
         if d_f != self.filename:
             raise ValueError
-        target = self.contents.find(self.locations[d_t][d_i])
+        target_node = self.locations[d_t][d_i]
+        target = self.nodes[target_node]
         if target is None:
             return False
         target.text = prefix + (target.text or '') + suffix
+        self.update_indents(target_node)
+        self.invalidate_dump(target_node)
         return True
 
-    def find_indent(self, xpath):
-        if xpath == '.':
-            return ''
+    def find_indent(self, node):
+        return self.indents[node]
 
-        def aux(root, xpath):
-            m = re.match(r'^(.*)\/[^\[]+\[(\d+)\]$', xpath)
-            target = root.find(xpath)
-            parent = root.find(m.groups()[0])
-            if target is None:
-                raise AssertionError
-            if parent is root:
-                return ''
-            index = int(m.groups()[1])
-            if index == 1:
-                parent_lead = parent.text
-            else:
-                for child in parent:
-                    if child is target:
-                        break
-                    parent_lead = child.tail
-                else:
-                    raise RuntimeError
-            if parent_lead and '\n' in parent_lead:
-                lead = parent_lead.split('\n')[-1]
-                return re.match(r'^(\s*)', lead).groups()[0]
-            lead = self.find_indent(m.groups()[0]) + (parent_lead or '')
+    def child_indent(self, parent, target):
+        # indentation of a child element of a node (walking its siblings)
+        first = True # first child with that tag
+        lead = None
+        for child in self.nodes[parent]:
+            if child is target:
+                break
+            if child.tag == target.tag:
+                first = False
+            lead = child.tail
+        else:
+            raise RuntimeError
+        if first:
+            lead = self.nodes[parent].text
+        return self.lead_indent(parent, lead)
+
+    def lead_indent(self, parent, lead):
+        # indentation of a child element of a node, given the text preceding it
+        if self.parents[parent] is None:
+            return ''
+        if lead and '\n' in lead:
+            lead = lead.split('\n')[-1]
             return re.match(r'^(\s*)', lead).groups()[0]
+        lead = self.indents[parent] + (lead or '')
+        return re.match(r'^(\s*)', lead).groups()[0]
 
-        return aux(self.contents, xpath)
+    def update_indents(self, node):
+        # the text or children of a node changed: so may have the indentation of its descendants
+        # (it depends on the text preceding the first sibling with the same tag)
+        for i in range(node+1, self.subtree_ends[node]):
+            if self.nodes[i] is not None:
+                self.indents[i] = self.child_indent(self.parents[i], self.nodes[i])
 
     def replace_indent(self, target, ind_t, ind_i, _first=True):
         if target.text:
@@ -333,3 +362,5 @@ class XmlModel(AbstractXmlModel):
             self.replace_indent(child, ind_t, ind_i, False)
 
 magpie.utils.known_models.append(XmlModel)
+
+_DUMP_CHUNK_SIZE = 256 # nodes
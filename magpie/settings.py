@@ -9,6 +9,9 @@ work_dir = '_magpie_work'
 local_original_copy = False
 local_original_name = '__original__'
 output_encoding = 'ascii'
+workers = 1
+sync_mode = 'full' # full / manifest
+work_backend = 'copy' # copy / hardlink / tmpfs
 
 edit_retries = 10
 default_timeout = 30
@@ -25,3 +28,5 @@ log_format_diffif = '\n{diff}'
 diff_method = 'unified' # unified / context
 
 trust_local_filesystem = True
+
+profile = False
@@ -0,0 +1,117 @@
+# Micro-benchmarks of models, edits, and variant construction
+#
+# usage: python -m tests.benchmarks.bench_models [--output FILE] [--compare FILE]
+# (results are seconds per operation; compare against a previous --output to detect regressions)
+
+import pathlib
+import random
+
+import magpie
+import magpie.models.astor
+from magpie.core import AbstractSoftware, Patch, Variant
+
+from .util import main, measure
+
+PATCH_COUNT = 20
+PATCH_SIZE = 10
+
+# (label, path, target file, model, edits)
+TARGETS = [
+    ('line_triangle', 'examples/triangle-c', 'triangle.c', 'LineModel',
+     ['LineDeletion', 'LineReplacement', 'LineInsertion']),
+    ('line_solver', 'examples/minisat/_magpie', 'Solver.cc.xml', 'LineModel',
+     ['LineDeletion', 'LineReplacement', 'LineInsertion']),
+    ('xml_triangle', 'examples/triangle-c/_magpie', 'triangle_slow.c.xml', 'XmlModel',
+     ['XmlNodeDeletion<expr_stmt>', 'XmlNodeReplacement<expr_stmt>', 'XmlNodeInsertion<expr_stmt,block_content>']),
+    ('srcml_triangle', 'examples/triangle-c/_magpie', 'triangle_slow.c.xml', 'SrcmlModel',
+     ['SrcmlStmtDeletion', 'SrcmlStmtReplacement', 'SrcmlStmtInsertion', 'SrcmlExprReplacement']),
+    ('srcml_solver', 'examples/minisat/_magpie', 'Solver.cc.xml', 'SrcmlModel',
+     ['SrcmlStmtDeletion', 'SrcmlStmtReplacement', 'SrcmlStmtInsertion', 'SrcmlExprReplacement']),
+    ('astor_triangle', 'examples/triangle-py', 'triangle.py', 'AstorModel',
+     ['AstorStmtDeletion', 'AstorStmtReplacement', 'AstorStmtInsertion']),
+    ('params_minisat', 'examples/minisat', 'minisat_simplified.params', 'ParamFileConfigModel',
+     ['ParamSetting']),
+]
+
+
+class BenchSoftware(AbstractSoftware):
+    def __init__(self, path, target_file, model):
+        super().__init__(str(pathlib.Path(magpie.settings.magpie_root) / path), reset=False)
+        self.target_files = [target_file]
+        self.model_rules = [('*', model)]
+        self.model_config = []
+        self.reset_contents()
+
+    def evaluate_variant(self, variant, cached_run=None):
+        pass
+
+def random_patches(software, edits):
+    # deterministic, and only with edits that can be applied
+    random.seed(0)
+    klasses = [magpie.utils.edit_from_string(s) for s in edits]
+    patches = []
+    for _ in range(PATCH_COUNT):
+        patch = Patch()
+        for _ in range(PATCH_SIZE * magpie.settings.edit_retries):
+            if len(patch.edits) == PATCH_SIZE:
+                break
+            try:
+                edit = random.choice(klasses).auto_create(software.noop_variant)
+                if edit is None:
+                    continue
+                Variant(software, Patch([*patch.edits, edit]))
+            except Exception: # noqa: BLE001
+                continue
+            patch.edits.append(edit)
+        patches.append(patch)
+    return patches
+
+def target_benchmarks(label, path, target_file, model, edits):
+    software = BenchSoftware(path, target_file, model)
+    patches = random_patches(software, edits)
+    noop = software.noop_variant
+    n = len(patches)
+
+    def build_variants():
+        return ([Variant(software, patch) for patch in patches],)
+
+    def bench_init(repeat):
+        return measure(lambda: BenchSoftware(path, target_file, model), repeat=repeat)
+
+    def bench_clone(repeat):
+        return measure(lambda: [noop.models[target_file].clone() for _ in range(n)], ops=n, repeat=repeat)
+
+    def bench_variant(repeat):
+        return measure(build_variants, ops=n, repeat=repeat)
+
+    def bench_apply(repeat):
+        ops = sum(len(patch.edits) for patch in patches)
+        def apply_all(models):
+            for patch, model in zip(patches, models):
+                variant = Variant(software)
+                variant.models[target_file] = model
+                for edit in patch.edits:
+                    edit.apply(noop, variant)
+        return measure(apply_all, ops=ops, repeat=repeat, setup=lambda: ([noop.models[target_file].clone() for _ in patches],))
+
+    def bench_dump(repeat):
+        return measure(lambda variants: [v.models[target_file].dump() for v in variants], ops=n, repeat=repeat, setup=build_variants)
+
+    def bench_diff(repeat):
+        return measure(lambda variants: [v._diff(noop) for v in variants], ops=n, repeat=repeat, setup=build_variants)
+
+    return [
+        (f'{label}/init', bench_init),
+        (f'{label}/clone', bench_clone),
+        (f'{label}/variant', bench_variant),
+        (f'{label}/apply', bench_apply),
+        (f'{label}/dump', bench_dump),
+        (f'{label}/diff', bench_diff),
+    ]
+
+def all_benchmarks(args):
+    for target in TARGETS:
+        yield from target_benchmarks(*target)
+
+if __name__ == '__main__':
+    main('Magpie model benchmarks', all_benchmarks)
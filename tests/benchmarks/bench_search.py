@@ -0,0 +1,118 @@
+# End-to-end search throughput on a synthetic target software
+#
+# usage: python -m tests.benchmarks.bench_search [--runtime SECONDS] [--output-size BYTES] [--output FILE] [--compare FILE]
+# (results are seconds per evaluation; "overhead" is the time per evaluation not spent in external commands)
+
+import configparser
+import logging
+import pathlib
+import statistics
+import tempfile
+
+import magpie
+from magpie.core import Patch
+
+from .util import main
+
+COMMAND_PHASES = ['setup', 'compile', 'test', 'run']
+
+
+def create_target(path, lines, runtime, output_size):
+    # trivial "compilation", and a run time and output volume independent of the variant
+    path.mkdir()
+    with (path / 'prog.txt').open('w') as f:
+        f.writelines(f'line {i}\n' for i in range(lines))
+    with (path / 'run.sh').open('w') as f:
+        f.write(f'head -c {output_size} /dev/zero | tr "\\0" x\n')
+        if runtime > 0:
+            f.write(f'sleep {runtime}\n')
+
+def scenario(path, args):
+    return {
+        'magpie': {
+            'log_dir': str(path / 'logs'),
+            'work_dir': str(path / 'work'),
+            'workers': args.workers,
+        },
+        'magpie.log': {
+            'color_output': False,
+        },
+        'software': {
+            'path': str(path / 'target'),
+            'target_files': 'prog.txt',
+            'fitness': 'time',
+            'compile_cmd': 'cmp -s prog.txt prog.txt',
+            'run_cmd': 'sh run.sh',
+            'default_lengthout': max(int(1e4), 2*args.output_size),
+        },
+        'search': {
+            'max_steps': args.steps,
+            'possible_edits': 'LineDeletion LineReplacement LineInsertion',
+        },
+    }
+
+def search_algos(args):
+    for algo in magpie.utils.known_algos:
+        if algo in [magpie.algos.DummySearch, magpie.algos.DebugSearch]:
+            continue
+        if args.algos and algo.__name__ not in args.algos.split(','):
+            continue
+        yield algo
+
+def run_search(path, args, algo):
+    config = configparser.ConfigParser()
+    config.read_dict(magpie.core.default_scenario)
+    config.read_dict(scenario(path, args))
+    config['magpie']['seed'] = '0'
+    magpie.core.pre_setup(config)
+    magpie.core.setup(config)
+    protocol = magpie.utils.protocol_from_string(config['search']['protocol'])()
+    protocol.search = algo()
+    protocol.software = magpie.utils.software_from_string(config['software']['software'])(config)
+    for handler in protocol.software.logger.handlers:
+        if not isinstance(handler, logging.FileHandler):
+            handler.setLevel(logging.WARNING)
+    if isinstance(protocol.search, magpie.algos.ValidSearch):
+        # validation algorithms start from an existing patch
+        protocol.search.setup(config)
+        protocol.search.debug_patch = Patch([protocol.search.create_edit(protocol.software.noop_variant) for _ in range(10)])
+    protocol.run(config)
+    return protocol.search.stats
+
+def search_benchmarks(args):
+    tmp_dir = tempfile.TemporaryDirectory()
+    path = pathlib.Path(tmp_dir.name)
+    create_target(path / 'target', args.lines, args.runtime, args.output_size)
+
+    def bench(algo, repeat):
+        # seconds per evaluation (search only, i.e., without warmup)
+        all_stats = [run_search(path, args, algo) for _ in range(repeat)]
+        samples = [stats['wallclock_total'] / max(stats['steps'], 1) for stats in all_stats]
+        stats = all_stats[samples.index(min(samples))]
+        steps = max(stats['steps'], 1)
+        commands = sum(stats['timings'].get(phase, 0) for phase in COMMAND_PHASES)
+        return {
+            'best': min(samples),
+            'median': statistics.median(samples),
+            'ops': steps,
+            'repeat': repeat,
+            'extra': {
+                'evals/s': steps / stats['wallclock_total'],
+                'overhead (ms/eval)': 1e3 * max(stats['wallclock_total'] * args.workers - commands, 0) / steps,
+            },
+        }
+
+    for algo in search_algos(args):
+        yield (f'search/{algo.__name__}', lambda repeat, algo=algo: bench(algo, repeat))
+    tmp_dir.cleanup()
+
+def add_arguments(parser):
+    parser.add_argument('--runtime', type=float, default=0, help='run time of the synthetic software (in seconds)')
+    parser.add_argument('--output-size', type=int, default=0, help='output volume of the synthetic software (in bytes)')
+    parser.add_argument('--lines', type=int, default=1000, help='number of lines of the synthetic target file')
+    parser.add_argument('--steps', type=int, default=100, help='number of evaluations per search')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--algos', type=str, default='', help='comma-separated list of algorithms (default: all)')
+
+if __name__ == '__main__':
+    main('Magpie search throughput benchmarks', search_benchmarks, add_arguments)
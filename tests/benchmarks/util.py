@@ -0,0 +1,77 @@
+import argparse
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import time
+
+
+def measure(func, ops=1, repeat=5, setup=None):
+    # seconds per operation (best and median over repeats), with a fresh setup for each repeat
+    samples = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) / ops)
+    return {'best': min(samples), 'median': statistics.median(samples), 'ops': ops, 'repeat': repeat}
+
+def save_results(filename, results):
+    data = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with pathlib.Path(filename).open('w') as f:
+        json.dump(data, f, indent=2)
+
+def compare_results(results, filename, threshold):
+    # returns the names of benchmarks slower than in the baseline (beyond threshold)
+    with pathlib.Path(filename).open('r') as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    print(f'{"benchmark":<40} {"baseline":>12} {"current":>12} {"ratio":>8}')
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['best'] / baseline[name]['best'] if baseline[name]['best'] > 0 else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = ' <-- regression'
+        print(f'{name:<40} {format_time(baseline[name]["best"]):>12} {format_time(result["best"]):>12} {ratio:>7.2f}x{flag}')
+    return regressions
+
+def format_time(seconds):
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return f'{seconds/scale:.2f}{unit}'
+    return f'{seconds/1e-9:.0f}ns'
+
+def main(description, benchmarks, add_arguments=None):
+    # benchmarks: function of the parsed arguments, returning an iterable of (name, function returning a measure dict)
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--output', type=pathlib.Path, help='save results to a JSON file')
+    parser.add_argument('--compare', type=pathlib.Path, help='compare with results from a previous JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown reported as a regression')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', type=str, default='', help='only run benchmarks containing this string')
+    if add_arguments:
+        add_arguments(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for name, bench in benchmarks(args):
+        if args.filter not in name:
+            continue
+        results[name] = bench(args.repeat)
+        extra = ''.join(f', {k}: {v:.2f}' if isinstance(v, float) else f', {k}: {v}' for k, v in results[name].get('extra', {}).items())
+        print(f'{name:<40} {format_time(results[name]["best"]):>12} (median: {format_time(results[name]["median"])}{extra})', flush=True)
+    if args.output:
+        save_results(args.output, results)
+    if args.compare:
+        print()
+        if compare_results(results, args.compare, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,74 @@
+import concurrent.futures
+import logging
+import random
+import time
+import types
+
+import magpie.core
+from magpie.algos import AblationAnalysis
+from magpie.core import Patch, RunResult
+from magpie.models.line import LineDeletionEdit
+
+edits = [LineDeletionEdit(('foo', 'line', i)) for i in range(5)]
+weights = [3, 1, 1, 2, 0] # fitness: total weight of the edits kept (with ties)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class PoolSoftware:
+    # evaluations finish after a random delay, i.e., in any order
+    def __init__(self, seed):
+        self.fitness = [types.SimpleNamespace(maximize=False)]
+        self.logger = logging.getLogger(f'test_ablation_{seed}')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = ListHandler()
+        self.logger.addHandler(self.handler)
+        self.random = random.Random(seed)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+        self.submitted = []
+        self.completed = []
+
+    def submit_variant(self, variant, cached_run=None):
+        self.submitted.append(variant.key)
+        return self.executor.submit(self.evaluate, variant, self.random.random()/50)
+
+    def evaluate(self, variant, delay):
+        time.sleep(delay)
+        run = RunResult(variant, 'SUCCESS')
+        run.fitness = [sum(weights[edits.index(e)] for e in variant.patch.edits)]
+        run.updated = True
+        self.completed.append(variant.key)
+        return run
+
+
+def ablation(monkeypatch, seed):
+    monkeypatch.setattr(magpie.core, 'Variant', lambda software, patch: types.SimpleNamespace(patch=patch, key=str(patch), diff=str(patch), timings={}))
+    algorithm = AblationAnalysis()
+    algorithm.software = PoolSoftware(seed)
+    algorithm.config['do_cleanup'] = False
+    algorithm.report['reference_fitness'] = [10]
+    algorithm.report['best_fitness'] = None
+    algorithm.report['best_patch'] = Patch(list(edits))
+    try:
+        result = algorithm.explore(Patch(list(edits)), None)
+    finally:
+        algorithm.software.executor.shutdown()
+        algorithm.software.logger.removeHandler(algorithm.software.handler)
+    return algorithm, result
+
+def test_completion_order(monkeypatch):
+    algorithm, result = ablation(monkeypatch, 0)
+    assert algorithm.software.completed != algorithm.software.submitted
+    for seed in range(1, 4):
+        other, other_result = ablation(monkeypatch, seed)
+        assert other.software.submitted == algorithm.software.submitted
+        assert other_result == result
+        assert other.software.handler.messages == algorithm.software.handler.messages
@@ -0,0 +1,26 @@
+import types
+
+from magpie.algos import GeneticProgrammingSteadyState
+from magpie.core import Patch, RunResult
+from magpie.models.line import LineDeletionEdit
+
+
+class StubAlgorithm(GeneticProgrammingSteadyState):
+    def hook_evaluation(self, variant, run, accept=False, best=False):
+        pass
+
+def success(fitness):
+    run = RunResult(None, 'SUCCESS')
+    run.fitness = fitness
+    return run
+
+def test_insert_duplicate():
+    algorithm = StubAlgorithm()
+    algorithm.software = types.SimpleNamespace(fitness=[types.SimpleNamespace(maximize=False)])
+    algorithm.config['pop_size'] = 3
+    patches = [Patch([LineDeletionEdit(('foo', 'line', i))]) for i in range(3)]
+    pop = {patch: success(10+i) for i, patch in enumerate(patches)}
+    algorithm.insert_offspring(types.SimpleNamespace(patch=Patch(patches[0].edits)), success(5), pop)
+    assert len(pop) == 3
+    assert pop[patches[0]].fitness == 5
+    assert algorithm.report['best_fitness'] == 5
@@ -0,0 +1,72 @@
+import configparser
+import types
+
+import pytest
+
+import magpie.core
+from magpie.algos import BestImprovement, TabuSearch
+from magpie.core import Patch, RunResult, default_scenario
+from magpie.models.line import LineDeletionEdit
+
+
+def make_config(**ls):
+    config = configparser.ConfigParser()
+    config.read_dict(default_scenario)
+    config['search']['possible_edits'] = 'LineDeletion'
+    config['search.ls'].update(ls)
+    return config
+
+def make_algorithm(klass, monkeypatch, config):
+    # every new edit targets a new line, every variant improves on the previous one
+    monkeypatch.setattr(magpie.core, 'Variant', lambda software, patch: types.SimpleNamespace(patch=patch))
+    algorithm = klass()
+    algorithm.setup(config)
+    algorithm.software = types.SimpleNamespace(fitness=[types.SimpleNamespace(maximize=False)], noop_variant=None)
+    algorithm.config['delete_prob'] = 0
+    algorithm.counter = 0
+    algorithm.evaluated = []
+
+    def create_edit(variant=None):
+        algorithm.counter += 1
+        return LineDeletionEdit(('foo', 'line', algorithm.counter))
+
+    def evaluate_variant(variant, force=False):
+        run = RunResult(variant, 'SUCCESS')
+        run.fitness = 100 - algorithm.counter
+        return run
+
+    def hook_evaluation(variant, run, accept=False, best=False):
+        algorithm.evaluated.append(variant.patch)
+
+    algorithm.create_edit = create_edit
+    algorithm.evaluate_variant = evaluate_variant
+    algorithm.hook_evaluation = hook_evaluation
+    return algorithm
+
+@pytest.mark.parametrize(('max_neighbours', 'expected'), [('', 20), ('5', 5)])
+def test_max_neighbours(monkeypatch, max_neighbours, expected):
+    algorithm = make_algorithm(BestImprovement, monkeypatch, make_config(max_neighbours=max_neighbours))
+    assert algorithm.config['max_neighbours'] == expected
+    current_patch, current_fitness = Patch([]), 100
+    for _ in range(expected):
+        current_patch, current_fitness = algorithm.explore(current_patch, current_fitness)
+        assert current_patch == Patch([])
+    # the neighbourhood is exhausted: move to its best neighbour
+    current_patch, current_fitness = algorithm.explore(current_patch, current_fitness)
+    assert current_patch == algorithm.evaluated[-1]
+    assert len(algorithm.evaluated) == expected + 1
+
+def test_tabu_list(monkeypatch):
+    algorithm = make_algorithm(TabuSearch, monkeypatch, make_config(max_neighbours='1', tabu_length='3'))
+    assert algorithm.config['tabu_length'] == 3
+    current_patch, current_fitness = Patch([]), 100
+    moves = []
+    for _ in range(10):
+        patch, current_fitness = algorithm.explore(current_patch, current_fitness)
+        if patch is not current_patch:
+            moves.append(patch)
+        current_patch = patch
+    assert moves
+    assert None not in algorithm.tabu_list
+    assert len(algorithm.tabu_list) < 3
+    assert algorithm.tabu_list[-1] == moves[-1]
@@ -0,0 +1,48 @@
+import logging
+import types
+
+import magpie.core
+from magpie.algos import ValidMinifyDD
+from magpie.core import Patch, RunResult
+from magpie.models.line import LineDeletionEdit
+
+edits = [LineDeletionEdit(('foo', 'line', i)) for i in range(6)]
+
+
+class StubAlgorithm(ValidMinifyDD):
+    def hook_evaluation(self, variant, run, accept=False, best=False):
+        pass
+
+    def evaluate_variant(self, variant, force=False, surrogate=True):
+        run = RunResult(variant, 'SUCCESS')
+        run.fitness = self.fitness(variant.patch.edits)
+        if run.fitness is None:
+            run.status = 'RUN_CODE_ERROR'
+        return run
+
+    def evaluate_variants(self, variants, force=False, surrogate=True):
+        return [self.evaluate_variant(variant) for variant in variants]
+
+    @staticmethod
+    def fitness(patch_edits):
+        # [1, 2] alone passes, as do patches with both 0 and 5; one complement is measured slightly faster
+        idx = [edits.index(e) for e in patch_edits]
+        if idx == [1, 2]:
+            return 10
+        if idx == [0, 1, 2, 4, 5]:
+            return 9.99
+        if 0 in idx and 5 in idx:
+            return 10
+        return None
+
+def test_subset_before_complement(monkeypatch):
+    monkeypatch.setattr(magpie.core, 'Variant', lambda software, patch: types.SimpleNamespace(patch=patch))
+    algorithm = StubAlgorithm()
+    algorithm.software = types.SimpleNamespace(
+        fitness=[types.SimpleNamespace(maximize=False)],
+        logger=logging.getLogger('test_validation'),
+    )
+    algorithm.config['do_cleanup'] = False
+    algorithm.explore(Patch(list(edits)), None)
+    assert algorithm.report['best_patch'] == Patch(edits[1:3])
+    assert algorithm.report['best_fitness'] == 10
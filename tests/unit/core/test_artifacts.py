@@ -0,0 +1,47 @@
+import types
+
+from magpie.core import BasicSoftware, ExecResult
+
+
+def make_software(tmp_path, artifacts):
+    software = BasicSoftware.__new__(BasicSoftware)
+    software.artifacts = artifacts
+    software.artifacts_path = tmp_path / '__artifacts__'
+    return software
+
+def test_key(tmp_path):
+    software = make_software(tmp_path, ['prog'])
+    key1 = software.artifacts_key(types.SimpleNamespace(key=''), 'make')
+    key2 = software.artifacts_key(types.SimpleNamespace(key='abc'), 'make')
+    key3 = software.artifacts_key(types.SimpleNamespace(key='abc'), 'make -O3')
+    assert len({key1, key2, key3}) == 3
+    assert key2 == software.artifacts_key(types.SimpleNamespace(key='abc'), 'make')
+
+def test_store_restore(tmp_path):
+    software = make_software(tmp_path, ['build/prog', 'lib'])
+    work_path = tmp_path / 'work'
+    (work_path / 'build').mkdir(parents=True)
+    (work_path / 'build' / 'prog').write_text('v1')
+    (work_path / 'lib').mkdir()
+    (work_path / 'lib' / 'a.so').write_text('a1')
+    exec_result = ExecResult(['make'], 'SUCCESS', 0, b'ok', b'', 1.5, 2)
+    assert software.restore_artifacts('k', work_path) is None
+    software.store_artifacts('k', work_path, exec_result)
+
+    # overwritten by another compilation
+    (work_path / 'build' / 'prog').write_text('v2')
+    (work_path / 'lib' / 'a.so').unlink()
+    (work_path / 'lib' / 'b.so').write_text('b2')
+    restored = software.restore_artifacts('k', work_path)
+    assert restored.status == 'SUCCESS'
+    assert restored.stdout == b'ok'
+    assert (work_path / 'build' / 'prog').read_text() == 'v1'
+    assert sorted(p.name for p in (work_path / 'lib').iterdir()) == ['a.so']
+
+def test_missing_artifact(tmp_path):
+    software = make_software(tmp_path, ['prog'])
+    work_path = tmp_path / 'work'
+    work_path.mkdir()
+    software.store_artifacts('k', work_path, ExecResult(['make'], 'SUCCESS', 0, b'', b'', 0, 0))
+    assert software.restore_artifacts('k', work_path) is None
+    assert list(software.artifacts_path.iterdir()) == []
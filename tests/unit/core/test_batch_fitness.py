@@ -0,0 +1,42 @@
+import pytest
+
+from magpie.core import BasicSoftware, RunResult, default_scenario
+
+
+class StubSoftware(BasicSoftware):
+    def __init__(self, bin_strategy, strategy):
+        config = default_scenario.copy()
+        config['software'] = dict(config['software'])
+        config['software'].update({
+            'path': 'foo',
+            'target_files': 'foo/bar',
+            'possible_edits': 'LineDeletion',
+            'fitness': 'time',
+            'batch_bin_fitness_strategy': bin_strategy,
+            'batch_fitness_strategy': strategy,
+        })
+        super().__init__(config)
+
+    def reset_workdir(self):
+        pass
+
+    def reset_contents(self):
+        self.contents = {}
+        self.locations = {}
+
+@pytest.mark.parametrize(('bin_strategy', 'strategy', 'fitness'), [
+    ('aggregate', 'sum', 16),
+    ('sum', 'sum', 16),
+    ('average', 'sum', 8),
+    ('sum', 'average', 8),
+    ('average', 'average', 4),
+])
+def test_process_batch_final(bin_strategy, strategy, fitness):
+    software = StubSoftware(bin_strategy, strategy)
+    assert software.batch_bin_fitness_strategy == bin_strategy
+    assert software.batch_fitness_strategy == strategy
+    software.batch = [['a', 'b'], ['c', 'd']]
+    run = RunResult(None, 'SUCCESS')
+    run.cache = {inst: ('SUCCESS', [v]) for inst, v in zip('abcd', [1, 3, 5, 7])}
+    software.process_batch_final(run)
+    assert run.fitness == [pytest.approx(fitness)]
@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+from magpie.core import BasicSoftware, ExecResult
+
+
+class StubSoftware(BasicSoftware):
+    def __init__(self, batch_workers):
+        self.run_cmd = 'run {INST}'
+        self.batch_workers = batch_workers
+        self.started = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def exec_cmd(self, cmd, timeout=None, lengthout=None):
+        with self.lock:
+            self.started.append(cmd[1])
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05 if cmd[1] == '1' else 0.01) # first instance finishes last
+        with self.lock:
+            self.running -= 1
+        return ExecResult(cmd, 'SUCCESS', 0, b'', b'', 0.01, 0)
+
+insts = ['1', '2', '3', '4', '5', '6']
+
+@pytest.mark.parametrize('batch_workers', [1, 2, 4])
+def test_order(batch_workers):
+    software = StubSoftware(batch_workers)
+    results = list(software.exec_run_cmds(insts, '', None, None))
+    assert [r.cmd[1] for r in results] == insts
+    assert sorted(software.started) == insts
+    assert software.max_running <= batch_workers
+
+def test_close():
+    software = StubSoftware(2)
+    results = software.exec_run_cmds(insts, '', None, None)
+    assert next(results).cmd[1] == '1'
+    results.close()
+    assert sorted(software.started) == ['1', '2']
+    assert software.running == 0
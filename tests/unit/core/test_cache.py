@@ -0,0 +1,76 @@
+import pytest
+
+from magpie.core import BasicAlgorithm, RunResult
+from magpie.core.cache import LFUCache, LRUCache, SizeCache
+
+
+def test_lru():
+    cache = LRUCache(4, 0.5)
+    for k in 'abcd':
+        cache.set(k, k)
+    assert cache.get('a') == 'a'
+    cache.set('e', 'e') # evicts b, c, d
+    assert len(cache) == 2
+    assert 'a' in cache
+    assert 'e' in cache
+    assert cache.get('b') is None
+
+def test_lfu():
+    cache = LFUCache(4, 0.5)
+    for k in 'abcd':
+        cache.set(k, k)
+    for _ in range(3):
+        cache.get('c')
+    cache.get('a')
+    cache.get('d')
+    cache.set('e', 'e') # evicts b, then a and d
+    assert len(cache) == 2
+    assert 'c' in cache
+    assert 'e' in cache
+
+@pytest.mark.parametrize('klass', [LRUCache, LFUCache])
+def test_pinned(klass):
+    cache = klass(2, 0)
+    cache.set('', 'ref')
+    for k in 'abcd':
+        cache.set(k, k)
+    assert cache.get('') == 'ref'
+
+@pytest.mark.parametrize('klass', [LRUCache, LFUCache])
+def test_unbounded(klass):
+    cache = klass(0)
+    for k in range(100):
+        cache.set(str(k), k)
+    assert len(cache) == 100
+
+def test_size():
+    run = RunResult(None, 'SUCCESS')
+    size = SizeCache.footprint(run)
+    cache = SizeCache(3*size, 0.5)
+    for k in 'abc':
+        cache.set(k, RunResult(None, 'SUCCESS'))
+    assert len(cache) == 3
+    cache.set('d', RunResult(None, 'SUCCESS'))
+    assert len(cache) == 1
+    assert 'd' in cache
+
+class StubAlgorithm(BasicAlgorithm):
+    def run(self):
+        pass
+
+def test_size_unit():
+    algorithm = StubAlgorithm()
+    algorithm.config['cache_maxsize'] = 1 # kB
+    algorithm.config['cache_policy'] = 'size'
+    algorithm.cache_reset()
+    assert algorithm.cache.maxsize == 1024
+    run = RunResult(None, 'SUCCESS')
+    run.log = 'x'*(600 - SizeCache.footprint(run))
+    assert SizeCache.footprint(run) == 600
+    algorithm.cache_set('a', run)
+    assert 'a' in algorithm.cache
+    algorithm.cache_set('b', RunResult(None, 'SUCCESS'))
+    assert 'a' in algorithm.cache
+    algorithm.cache_set('c', run) # over 1 kB in total: evicts the least recently used
+    assert 'a' not in algorithm.cache
+    assert 'c' in algorithm.cache
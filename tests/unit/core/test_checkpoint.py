@@ -0,0 +1,21 @@
+from magpie.core import Patch
+from magpie.core.cache import LRUCache
+from magpie.core.checkpoint import load_checkpoint, save_checkpoint
+from magpie.models.line import LineDeletionEdit, LineReplacementEdit
+
+
+def test_roundtrip(tmp_path):
+    filename = tmp_path / 'foo.checkpoint'
+    patch = Patch([LineDeletionEdit(('foo.c', '_line', 3)), LineReplacementEdit(('foo.c', '_line', 1), ('foo.c', '_line', 2))])
+    save_checkpoint(filename, {'best_patch': patch, 'pop': {patch: ('SUCCESS', 42)}})
+    assert not (tmp_path / 'foo.checkpoint.tmp').exists()
+    data = load_checkpoint(filename)
+    assert data['best_patch'] == patch
+    assert data['pop'] == {patch: ('SUCCESS', 42)}
+
+def test_cache_items():
+    cache = LRUCache(4, 0.5)
+    cache.set('', 'ref')
+    for k in 'ab':
+        cache.set(k, k.upper())
+    assert dict(cache.items()) == {'': 'ref', 'a': 'A', 'b': 'B'}
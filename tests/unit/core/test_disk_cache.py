@@ -0,0 +1,38 @@
+from magpie.core import RunResult
+from magpie.core.disk_cache import DiskCache
+
+
+def test_roundtrip(tmp_path):
+    run = RunResult(None, 'SUCCESS')
+    run.fitness = [3.0]
+    run.cache['inst1'] = ('SUCCESS', [1.0])
+    run.cache['inst2'] = ('SUCCESS', [2.0])
+    cache = DiskCache(tmp_path / 'cache.db', 'scope')
+    assert cache.get('diff') is None
+    cache.set('diff', run)
+    cache.close()
+    cache = DiskCache(tmp_path / 'cache.db', 'scope')
+    run2 = cache.get('diff')
+    assert run2.status == 'SUCCESS'
+    assert run2.fitness == [3.0]
+    assert run2.cache == {'inst1': ('SUCCESS', [1.0]), 'inst2': ('SUCCESS', [2.0])}
+    cache.close()
+
+def test_failed(tmp_path):
+    run = RunResult(None, 'COMPILE_CODE_ERROR')
+    cache = DiskCache(tmp_path / 'cache.db', 'scope')
+    cache.set('diff', run)
+    run2 = cache.get('diff')
+    assert run2.status == 'COMPILE_CODE_ERROR'
+    assert run2.fitness is None
+    assert run2.cache == {}
+    cache.close()
+
+def test_scope(tmp_path):
+    run = RunResult(None, 'SUCCESS')
+    cache = DiskCache(tmp_path / 'cache.db', 'scope1')
+    cache.set('diff', run)
+    cache.close()
+    cache = DiskCache(tmp_path / 'cache.db', 'scope2')
+    assert cache.get('diff') is None
+    cache.close()
@@ -0,0 +1,48 @@
+import random
+import types
+
+import pytest
+
+from magpie.core import BasicAlgorithm, Patch, RunResult
+from magpie.models.line import LineDeletionEdit, LineInsertionEdit, LineReplacementEdit
+
+
+class StubAlgorithm(BasicAlgorithm):
+    def run(self):
+        pass
+
+@pytest.fixture
+def my_algorithm():
+    algorithm = StubAlgorithm()
+    algorithm.config['possible_edits'] = [LineDeletionEdit, LineInsertionEdit, LineReplacementEdit]
+    return algorithm
+
+def evaluate(algorithm, edit, status, best=False):
+    algorithm.edits_pending[edit] = None
+    variant = types.SimpleNamespace(patch=Patch([edit]))
+    algorithm.edit_rewards(variant, RunResult(variant, status), best)
+
+def test_rewards(my_algorithm):
+    evaluate(my_algorithm, LineDeletionEdit(('foo', 'line', 1)), 'SUCCESS', best=True)
+    evaluate(my_algorithm, LineDeletionEdit(('foo', 'line', 2)), 'SUCCESS')
+    evaluate(my_algorithm, LineInsertionEdit(('foo', '_inter_line', 1), ('foo', 'line', 2)), 'COMPILE_CODE_ERROR')
+    evaluate(my_algorithm, LineInsertionEdit(('foo', '_inter_line', 2), ('foo', 'line', 2)), 'SURROGATE_SKIPPED')
+    assert my_algorithm.stats['edit_arms'] == {'LineDeletionEdit': [2, 1.5], 'LineInsertionEdit': [1, 0]}
+
+    # only newly created edits are rewarded
+    edit = LineDeletionEdit(('foo', 'line', 1))
+    variant = types.SimpleNamespace(patch=Patch([edit]))
+    my_algorithm.edit_rewards(variant, RunResult(variant, 'SUCCESS'), False)
+    assert my_algorithm.stats['edit_arms']['LineDeletionEdit'] == [2, 1.5]
+
+@pytest.mark.parametrize('mode', ['ucb', 'thompson'])
+def test_selection(my_algorithm, mode):
+    random.seed(0)
+    my_algorithm.config['edit_selection'] = mode
+    for _ in range(200):
+        klass = my_algorithm.select_edit_class()
+        status = 'SUCCESS' if klass is LineDeletionEdit else 'COMPILE_CODE_ERROR'
+        arm = my_algorithm.stats['edit_arms'].setdefault(klass.__name__, [0, 0])
+        arm[0] += 1
+        arm[1] += 0.5 if status == 'SUCCESS' else 0
+    assert my_algorithm.stats['edit_arms']['LineDeletionEdit'][0] > 150
@@ -0,0 +1,57 @@
+import pickle
+import random
+
+import pytest
+
+from magpie.core.instances import InstanceBin, InstanceFile
+
+
+@pytest.fixture
+def instance_file(tmp_path):
+    path = tmp_path / 'instances.txt'
+    path.write_bytes(b'# comment\nfoo\n\n  bar  \r\n#baz\nqux')
+    return path
+
+def test_file(instance_file):
+    instances = InstanceFile(instance_file)
+    assert len(instances) == 3
+    assert [instances[i] for i in range(3)] == ['foo', 'bar', 'qux']
+
+def test_file_empty(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    my_bin = InstanceBin()
+    my_bin.extend_from_file(path)
+    assert not my_bin
+    assert list(my_bin) == []
+
+def test_bin(instance_file):
+    my_bin = InstanceBin()
+    my_bin.append('a')
+    my_bin.extend_from_file(instance_file)
+    my_bin.append('b')
+    my_bin.append('c')
+    assert len(my_bin) == 6
+    assert list(my_bin) == ['a', 'foo', 'bar', 'qux', 'b', 'c']
+    with pytest.raises(IndexError):
+        my_bin[6]
+
+def test_bin_shuffle(instance_file):
+    my_bin = InstanceBin()
+    for i in range(100):
+        my_bin.append(str(i))
+    random.seed(0)
+    my_bin.shuffle()
+    first = my_bin[0]
+    assert len(my_bin.permutation) <= 2 # only drawn positions are stored
+    tmp = list(my_bin)
+    assert tmp[0] == first
+    assert tmp != [str(i) for i in range(100)]
+    assert sorted(tmp, key=int) == [str(i) for i in range(100)]
+
+def test_bin_pickle(instance_file):
+    my_bin = InstanceBin()
+    my_bin.extend_from_file(instance_file)
+    assert my_bin[0] == 'foo'
+    other = pickle.loads(pickle.dumps(my_bin))
+    assert list(other) == list(my_bin)
@@ -0,0 +1,46 @@
+import types
+
+import pytest
+
+from magpie.core import BasicSoftware, RunResult
+
+
+@pytest.fixture
+def my_software():
+    software = BasicSoftware.__new__(BasicSoftware)
+    software.fitness = [types.SimpleNamespace(maximize=False)]
+    software.batch = [['1', '2', '3', '4', '5', '6']]
+    software.batch_bin_fitness_strategy = 'aggregate'
+    software.batch_fitness_strategy = 'sum'
+    software.batch_racing_alpha = 0.05
+    software.race_reference = {inst: ('SUCCESS', [10.0]) for inst in software.batch[0]}
+    return software
+
+def partial_run(values):
+    run = RunResult(None, 'SUCCESS')
+    run.cache = {str(i+1): ('SUCCESS', [v]) for i, v in enumerate(values)}
+    return run
+
+@pytest.mark.parametrize(('values', 'lost'), [
+    ([], False),
+    ([20.0, 20.0], False),
+    ([20.0, 20.0, 20.0, 1.0], True),
+    ([5.0, 5.0, 5.0, 5.0, 5.0], False),
+])
+def test_bound(my_software, values, lost):
+    my_software.batch_racing = 'bound'
+    assert my_software.race_lost(partial_run(values)) == lost
+
+@pytest.mark.parametrize(('values', 'lost'), [
+    ([], False),
+    ([11.0, 11.0, 11.0, 11.0], False),
+    ([11.0, 11.0, 11.0, 11.0, 11.0], True),
+    ([11.0, 11.0, 11.0, 11.0, 9.0], False),
+])
+def test_sign(my_software, values, lost):
+    my_software.batch_racing = 'sign'
+    assert my_software.race_lost(partial_run(values)) == lost
+
+def test_disabled(my_software):
+    my_software.batch_racing = None
+    assert not my_software.race_lost(partial_run([100.0]*5))
@@ -0,0 +1,103 @@
+import os
+import sys
+
+import pytest
+
+import magpie.settings
+from magpie.core import AbstractSoftware, Patch, Variant
+from magpie.models.line import LineDeletionEdit
+
+
+class StubSoftware(AbstractSoftware):
+    def __init__(self):
+        super().__init__('foo', reset=False)
+        self.timestamp = '0'
+
+    def evaluate_variant(self, variant, cached_run=None):
+        pass
+
+@pytest.fixture
+def my_software():
+    return StubSoftware()
+
+def python_cmd(code):
+    return [sys.executable, '-c', code]
+
+def test_exec_success(my_software):
+    exec_result = my_software.exec_cmd(python_cmd('print("foo"); import sys; print("bar", file=sys.stderr)'))
+    assert exec_result.status == 'SUCCESS'
+    assert exec_result.return_code == 0
+    assert exec_result.stdout == b'foo\n'
+    assert exec_result.stderr == b'bar\n'
+    assert exec_result.output_length == 8
+
+def test_exec_return_code(my_software):
+    exec_result = my_software.exec_cmd(python_cmd('import sys; sys.exit(3)'))
+    assert exec_result.status == 'SUCCESS'
+    assert exec_result.return_code == 3
+
+def test_exec_large_output(my_software):
+    exec_result = my_software.exec_cmd(python_cmd('print("x"*999999)'), lengthout=1e7)
+    assert exec_result.status == 'SUCCESS'
+    assert exec_result.stdout == b'x'*999999 + b'\n'
+
+@pytest.mark.parametrize('lengthout', [1, 10, 100000])
+def test_exec_lengthout(my_software, lengthout):
+    exec_result = my_software.exec_cmd(python_cmd('print("x"*999999)'), lengthout=lengthout)
+    assert exec_result.status == 'LENGTHOUT'
+    assert exec_result.output_length == lengthout
+
+def test_exec_unlimited(my_software):
+    exec_result = my_software.exec_cmd(python_cmd('print("x"*999)'), lengthout=-1)
+    assert exec_result.status == 'SUCCESS'
+    assert exec_result.output_length == 1000
+
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason='requires wait4')
+def test_exec_rusage(my_software):
+    exec_result = my_software.exec_cmd(python_cmd('x = bytearray(50_000_000); sum(range(10**6))'))
+    assert exec_result.status == 'SUCCESS'
+    assert exec_result.return_code == 0
+    assert exec_result.rusage.ru_utime + exec_result.rusage.ru_stime > 0
+    assert exec_result.rusage.ru_maxrss > 40_000 # in kB on Linux
+
+def test_exec_timeout(my_software):
+    exec_result = my_software.exec_cmd(python_cmd('import time; time.sleep(5)'), timeout=0.5)
+    assert exec_result.status == 'TIMEOUT'
+    assert exec_result.runtime < 1.5
+
+def test_exec_cli_error(my_software):
+    exec_result = my_software.exec_cmd(['magpie_command_not_found'])
+    assert exec_result.status == 'CLI_ERROR'
+
+def test_exec_work_dir(my_software, tmp_path):
+    my_software.work_dir = tmp_path / 'worker_1'
+    exec_result = my_software.exec_cmd(python_cmd('import os; print(os.environ["MAGPIE_WORK_DIR"], end="")'))
+    assert exec_result.stdout.decode() == str(tmp_path / 'worker_1')
+
+class LineSoftware(AbstractSoftware):
+    def __init__(self, path, work_dir):
+        super().__init__(str(path), reset=False)
+        self.timestamp = '0'
+        self.work_dir = work_dir
+        self.target_files = ['foo.txt']
+        self.model_rules = [('*', 'LineModel')]
+        self.model_config = []
+        self.reset_contents()
+
+    def evaluate_variant(self, variant, cached_run=None):
+        pass
+
+@pytest.mark.parametrize('sync_mode', ['full', 'manifest'])
+def test_write_variant(tmp_path, monkeypatch, sync_mode):
+    monkeypatch.setattr(magpie.settings, 'sync_mode', sync_mode)
+    original = tmp_path / 'foo'
+    original.mkdir()
+    (original / 'foo.txt').write_text('a\nb\nc\n')
+    software = LineSoftware(original, tmp_path / 'work')
+    work_path = software.work_dir / software.basename
+    software.write_variant(Variant(software, Patch([LineDeletionEdit(('foo.txt', 'line', 1))])))
+    assert (work_path / 'foo.txt').read_text() == 'a\nc\n'
+    (work_path / 'foo.o').write_text('artefact')
+    software.write_variant(Variant(software, Patch([])))
+    assert (work_path / 'foo.txt').read_text() == 'a\nb\nc\n'
+    assert (work_path / 'foo.o').exists() == (sync_mode == 'manifest')
@@ -0,0 +1,93 @@
+import types
+
+import pytest
+
+import magpie.core.basic_algorithm
+from magpie.core import BasicAlgorithm, Patch, RunResult
+from magpie.core.surrogate import NaiveBayesSurrogate
+from magpie.core.worker_pool import WorkerPool
+from magpie.models.line import LineDeletionEdit
+from magpie.models.xml import SrcmlStmtDeletionEdit
+
+
+def deletion(klass, loc):
+    return klass(('foo.xml', 'stmt', loc))
+
+@pytest.mark.parametrize(('status', 'label'), [
+    ('SUCCESS', False),
+    ('COMPILE_CODE_ERROR', True),
+    ('RUN_TIMEOUT', True),
+    ('BATCH_RACED', None),
+    ('SURROGATE_SKIPPED', None),
+])
+def test_label(status, label):
+    assert NaiveBayesSurrogate.label(status) == label
+
+def test_features():
+    features = NaiveBayesSurrogate.features(Patch([deletion(SrcmlStmtDeletionEdit, 3)]))
+    assert len(features) == 3
+    assert len(set(features)) == 3
+
+def test_predict():
+    surrogate = NaiveBayesSurrogate()
+    assert surrogate.predict(Patch([deletion(SrcmlStmtDeletionEdit, 0)])) == pytest.approx(0.5)
+    for i in range(20):
+        surrogate.observe(Patch([deletion(SrcmlStmtDeletionEdit, i)]), 'COMPILE_CODE_ERROR')
+        surrogate.observe(Patch([deletion(LineDeletionEdit, i)]), 'SUCCESS')
+    surrogate.observe(Patch([deletion(LineDeletionEdit, 0)]), 'BATCH_RACED')
+    assert surrogate.observations == 40
+    assert surrogate.predict(Patch([deletion(SrcmlStmtDeletionEdit, 99)])) > 0.9
+    assert surrogate.predict(Patch([deletion(LineDeletionEdit, 99)])) < 0.1
+
+class StubSoftware:
+    def __init__(self):
+        self.fitness = [types.SimpleNamespace(maximize=False)]
+        self.batch = [['']]
+        self.race_reference = None
+        self.evaluated = []
+        self.pool = WorkerPool(self)
+
+    def evaluate_variant(self, variant, cached_run=None):
+        self.evaluated.append(variant.patch)
+        run = RunResult(variant, 'SUCCESS')
+        run.fitness = 10 if variant.patch.edits else 20
+        run.updated = True
+        return run
+
+    def submit_variant(self, variant, cached_run=None):
+        return self.pool.submit(variant, cached_run)
+
+
+class StubAlgorithm(BasicAlgorithm):
+    def run(self):
+        pass
+
+    def hook_warmup_evaluation(self, counter, patch, run):
+        pass
+
+    def hook_batch_evaluation(self, counter, patch, run, best=False):
+        pass
+
+def test_reset_batch(monkeypatch):
+    monkeypatch.setattr(magpie.core.basic_algorithm, 'Variant', lambda software, patch: types.SimpleNamespace(patch=patch, key=str(patch), timings={}))
+    algorithm = StubAlgorithm()
+    algorithm.software = StubSoftware()
+    algorithm.config['cache_maxsize'] = 0
+    algorithm.config['batch_bins'] = [['']]
+    algorithm.config['batch_sample_size'] = 1
+    algorithm.surrogate = NaiveBayesSurrogate()
+    best_patch = Patch([deletion(SrcmlStmtDeletionEdit, 0)])
+    for i in range(100):
+        algorithm.surrogate.observe(Patch([deletion(SrcmlStmtDeletionEdit, i)]), 'COMPILE_CODE_ERROR')
+    algorithm.surrogate.observe(Patch([]), 'SUCCESS')
+    algorithm.config['surrogate_explore'] = 0
+    assert algorithm.surrogate.predict(Patch([])) > algorithm.config['surrogate_threshold']
+    assert algorithm.surrogate.predict(best_patch) > algorithm.config['surrogate_threshold']
+
+    algorithm.report['reference_fitness'] = 20
+    algorithm.report['best_patch'] = best_patch
+    algorithm.hook_reset_batch()
+    assert algorithm.software.evaluated == [Patch([]), best_patch]
+    assert algorithm.report['best_patch'] == best_patch
+    assert algorithm.report['best_fitness'] == 10
+    assert algorithm.stats['surrogate_skips'] == 0
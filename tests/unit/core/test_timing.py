@@ -0,0 +1,48 @@
+import pytest
+
+from magpie.core import timing
+
+
+class RecordHook:
+    def __init__(self):
+        self.events = []
+
+    def enter(self, phase):
+        self.events.append(('enter', phase))
+
+    def exit(self, phase, elapsed):
+        self.events.append(('exit', phase))
+
+
+@pytest.fixture
+def hook(monkeypatch):
+    hook = RecordHook()
+    monkeypatch.setattr(timing, 'hooks', [hook])
+    return hook
+
+def test_timed(hook):
+    timings = {}
+    for _ in range(2):
+        with timing.timed(timings, 'compile'):
+            pass
+    with pytest.raises(ValueError), timing.timed(timings, 'run'):
+        raise ValueError
+    assert set(timings) == {'compile', 'run'}
+    assert all(elapsed >= 0 for elapsed in timings.values())
+    assert hook.events == [('enter', 'compile'), ('exit', 'compile')]*2 + [('enter', 'run'), ('exit', 'run')]
+
+def test_merge():
+    timings = {'compile': 1.0}
+    timing.merge_timings(timings, {'compile': 0.5, 'run': 2.0})
+    assert timings == {'compile': 1.5, 'run': 2.0}
+
+def test_cprofile(monkeypatch, tmp_path):
+    profiler = timing.CProfileHook()
+    monkeypatch.setattr(timing, 'hooks', [profiler])
+    timings = {}
+    with timing.timed(timings, 'variant'), timing.timed(timings, 'key'):
+        sorted(range(100))
+    with timing.timed(timings, 'compile'):
+        assert profiler.depth == 0
+    profiler.dump(tmp_path / 'foo.prof')
+    assert (tmp_path / 'foo.prof').exists()
@@ -0,0 +1,45 @@
+import pathlib
+
+import pytest
+
+from magpie.core import AbstractSoftware, Patch, Variant
+from magpie.models.line import LineDeletionEdit, LineInsertionEdit
+
+
+class StubSoftware(AbstractSoftware):
+    def __init__(self):
+        super().__init__(str(pathlib.Path('tests') / 'examples'), reset=False)
+        self.target_files = ['triangle.py']
+        self.model_rules = [('*', 'LineModel')]
+        self.model_config = []
+        self.reset_contents()
+
+    def evaluate_variant(self, variant, cached_run=None):
+        pass
+
+@pytest.fixture
+def my_software():
+    return StubSoftware()
+
+def test_noop(my_software):
+    variant = Variant(my_software, Patch([]))
+    assert variant.key == ''
+    assert variant.diff == ''
+    assert variant.models['triangle.py'] is my_software.noop_variant.models['triangle.py']
+
+def test_key(my_software):
+    variant1 = Variant(my_software, Patch([LineDeletionEdit(('triangle.py', 'line', 14))]))
+    variant2 = Variant(my_software, Patch([LineDeletionEdit(('triangle.py', 'line', 14))]))
+    variant3 = Variant(my_software, Patch([LineDeletionEdit(('triangle.py', 'line', 15))]))
+    assert variant1.key != ''
+    assert variant1.key == variant2.key
+    assert variant1.key != variant3.key
+    assert variant1.models['triangle.py'] is not my_software.noop_variant.models['triangle.py']
+
+def test_key_identical(my_software):
+    """Variants identical to the reference software share its key"""
+    edit1 = LineInsertionEdit(('triangle.py', '_inter_line', 15), ('triangle.py', 'line', 14))
+    edit2 = LineDeletionEdit(('triangle.py', 'line', 14))
+    variant = Variant(my_software, Patch([edit1, edit2]))
+    assert variant.key == ''
+    assert variant.diff == ''
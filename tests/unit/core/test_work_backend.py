@@ -0,0 +1,33 @@
+import pytest
+
+import magpie.settings
+from magpie.core import BasicSoftware
+
+
+@pytest.fixture
+def original(tmp_path):
+    path = tmp_path / 'original'
+    (path / 'src').mkdir(parents=True)
+    (path / 'src' / 'main.c').write_text('main')
+    (path / 'README').write_text('readme')
+    return path
+
+@pytest.mark.parametrize('backend', ['copy', 'hardlink'])
+def test_sync_folder(monkeypatch, tmp_path, original, backend):
+    monkeypatch.setattr(magpie.settings, 'work_backend', backend)
+    software = BasicSoftware.__new__(BasicSoftware)
+    target = tmp_path / 'work'
+    software.sync_folder(target, original)
+    assert (target / 'src' / 'main.c').read_text() == 'main'
+    linked = (target / 'README').stat().st_ino == (original / 'README').stat().st_ino
+    assert linked == (backend == 'hardlink')
+
+def test_unshare_file(monkeypatch, tmp_path, original):
+    monkeypatch.setattr(magpie.settings, 'work_backend', 'hardlink')
+    software = BasicSoftware.__new__(BasicSoftware)
+    target = tmp_path / 'work'
+    software.sync_folder(target, original)
+    magpie.core.abstract_software._unshare_file(target / 'src' / 'main.c')
+    (target / 'src' / 'main.c').write_text('mutated')
+    assert (original / 'src' / 'main.c').read_text() == 'main'
+    assert (target / 'README').stat().st_nlink == 2
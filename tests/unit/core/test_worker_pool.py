@@ -0,0 +1,70 @@
+import contextlib
+import os
+import pathlib
+import pickle
+import sys
+import time
+
+from magpie.core import AbstractSoftware, ExecResult, Patch, RunResult, Variant
+from magpie.core.worker_pool import WorkerPool
+from magpie.models.line import LineDeletionEdit
+
+
+def test_pickle_runresult():
+    run = RunResult(None, 'SUCCESS')
+    run.fitness = [1.0]
+    run.cache['inst'] = ('SUCCESS', [1.0])
+    run.last_exec = ExecResult(['(empty)'], 'SUCCESS', 0, b'out', b'err', 1, 6)
+    run2 = pickle.loads(pickle.dumps(run))
+    assert run2 == run
+    assert run2.last_exec.stdout == b'out'
+
+def test_completed():
+    run = RunResult(None, 'SUCCESS')
+    future = WorkerPool.completed(run)
+    assert future.done()
+    assert future.result() is run
+
+class PoolSoftware(AbstractSoftware):
+    def __init__(self, path, work_dir):
+        super().__init__(str(path), reset=False)
+        self.timestamp = '0'
+        self.work_dir = work_dir
+        self.target_files = ['foo.txt']
+        self.model_rules = [('*', 'LineModel')]
+        self.model_config = []
+        self.reset_contents()
+        self.batch = [['']]
+        self.race_reference = None
+        self.pool = WorkerPool(self, 2)
+
+    def evaluate_variant(self, variant, cached_run=None):
+        self.write_variant(variant)
+        with contextlib.chdir(self.work_dir / self.basename):
+            exec_result = self.exec_cmd([sys.executable, '-c', 'import os; print(os.environ["MAGPIE_WORK_DIR"], end="")'])
+            lines = pathlib.Path('foo.txt').read_text().split()
+        time.sleep(0.05*len(lines)) # the first submitted variants finish last
+        run = RunResult(variant, 'SUCCESS')
+        run.fitness = [len(lines)]
+        run.log = (os.getpid(), exec_result.stdout.decode(), lines)
+        return run
+
+def test_parallel_evaluation(tmp_path):
+    original = tmp_path / 'foo'
+    original.mkdir()
+    (original / 'foo.txt').write_text('a\nb\nc\nd\ne\nf\n')
+    software = PoolSoftware(original, tmp_path / 'work')
+    variants = [Variant(software, Patch([LineDeletionEdit(('foo.txt', 'line', i)) for i in range(k)])) for k in range(6)]
+    try:
+        futures = [software.submit_variant(variant) for variant in variants]
+        runs = [future.result() for future in futures]
+    finally:
+        software.pool.shutdown()
+    work_dirs = {}
+    for k, (variant, run) in enumerate(zip(variants, runs)):
+        pid, work_dir, lines = run.log
+        assert run.variant is variant
+        assert run.fitness == [6-k]
+        assert lines == list('abcdef')[k:]
+        assert work_dirs.setdefault(pid, work_dir) == work_dir
+    assert sorted(work_dirs.values()) == [str(tmp_path / 'work' / f'worker_{k}') for k in range(2)]
@@ -0,0 +1,55 @@
+import types
+
+import pytest
+
+import magpie.utils
+from magpie.core import BasicSoftware, ExecResult, RunResult, default_scenario
+
+
+class StubSoftware(BasicSoftware):
+    def __init__(self):
+        config = default_scenario.copy()
+        config['software'].update({
+            'path': 'foo',
+            'target_files': 'foo/bar',
+            'possible_edits': 'LineDeletion',
+            'fitness': 'rusage<maxrss>',
+        })
+        super().__init__(config)
+
+    def reset_workdir(self):
+        pass
+
+    def reset_contents(self):
+        self.contents = {}
+        self.locations = {}
+
+@pytest.fixture
+def my_software():
+    return StubSoftware()
+
+@pytest.fixture
+def my_runresult(my_software):
+    return RunResult(my_software, 'SUCCESS')
+
+@pytest.mark.parametrize(('template', 'status', 'fitness'), [
+    # SUCCESS on known fields, with or without prefix
+    ('rusage<maxrss>', 'SUCCESS', 2048),
+    ('rusage<ru_minflt>', 'SUCCESS', 12),
+    ('rusage<utime>', 'SUCCESS', 0.1235),
+    # PARSE_ERROR on unknown fields
+    ('rusage<foo>', 'PARSE_ERROR', None),
+])
+def test_process_run_rusage(my_software, my_runresult, template, status, fitness):
+    rusage = types.SimpleNamespace(ru_maxrss=2048, ru_minflt=12, ru_utime=0.123456)
+    exec_result = ExecResult(['(empty)'], 'SUCCESS', 0, b'', b'', 1, 0, rusage)
+    klass = magpie.utils.convert.fitness_from_string(template)
+    klass(my_software).process_run_exec(my_runresult, exec_result)
+    assert my_runresult.status == status
+    assert my_runresult.fitness == fitness
+
+def test_process_run_no_rusage(my_software, my_runresult):
+    exec_result = ExecResult(['(empty)'], 'SUCCESS', 0, b'', b'', 1, 0)
+    klass = magpie.utils.convert.fitness_from_string('rusage<maxrss>')
+    klass(my_software).process_run_exec(my_runresult, exec_result)
+    assert my_runresult.status == 'PARSE_ERROR'
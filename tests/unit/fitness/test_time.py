@@ -1,3 +1,5 @@
+import types
+
 import pytest
 
 import magpie.utils
@@ -83,3 +85,17 @@ def test_process_run_perfinstructions(my_software, my_runresult, stderr, status,
     klass(my_software).process_run_exec(my_runresult, exec_result)
     assert my_runresult.status == status
     assert my_runresult.fitness == fitness
+
+
+@pytest.mark.parametrize(('rusage', 'status', 'fitness'), [
+    # SUCCESS when resource usage is available
+    (types.SimpleNamespace(ru_utime=0.75, ru_stime=0.125), 'SUCCESS', 0.875),
+    # PARSE_ERROR otherwise
+    (None, 'PARSE_ERROR', None),
+])
+def test_process_run_cputime(my_software, my_runresult, rusage, status, fitness):
+    exec_result = ExecResult(['(empty)'], 'SUCCESS', 0, b'', b'', 1, 0, rusage)
+    klass = magpie.utils.convert.fitness_from_string('cpu_time')
+    klass(my_software).process_run_exec(my_runresult, exec_result)
+    assert my_runresult.status == status
+    assert my_runresult.fitness == fitness
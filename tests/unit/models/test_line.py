@@ -4,6 +4,7 @@ import pathlib
 
 import pytest
 
+import magpie.models.line.line_model
 from magpie.models.line import LineModel
 
 from .util import assert_diff
@@ -31,6 +32,32 @@ def test_dump(line_model, file_contents):
     dump = line_model.dump()
     assert dump == file_contents
 
+def test_clone(line_model):
+    """Edits on a clone should not affect the original model"""
+    dump = line_model.dump()
+    variant = line_model.clone()
+    assert variant.do_insert(line_model, ('triangle.py', '_inter_line', 3), ('triangle.py', 'line', 14))
+    assert variant.do_delete(('triangle.py', 'line', 14))
+    assert line_model.dump() == dump
+    assert variant.dump() != dump
+
+def test_incremental_dump(monkeypatch, file_contents):
+    """Dumps should only be partially recomputed after edits"""
+    monkeypatch.setattr(magpie.models.line.line_model, '_DUMP_CHUNK_SIZE', 4)
+    model = LineModel('triangle.py')
+    with contextlib.chdir(pathlib.Path('tests') / 'examples'):
+        model.init_contents()
+    assert model.dump() == file_contents
+    variant = model.clone()
+    assert variant.do_insert(model, ('triangle.py', '_inter_line', 4), ('triangle.py', 'line', 14))
+    assert variant.dump() == ''.join(f'{line}\n' for line in variant.contents)
+    assert sum(chunk is None for chunk in variant.chunk_dumps) == 0
+    assert variant.do_delete(('triangle.py', 'line', 9))
+    assert sum(chunk is None for chunk in variant.chunk_dumps) == 1
+    assert variant.do_replace(model, ('triangle.py', 'line', 2), ('triangle.py', 'line', 14))
+    assert variant.dump() == ''.join(f'{line}\n' for line in variant.contents if line is not None)
+    assert model.dump() == file_contents
+
 def test_deletion1(line_model):
     """Deletion should work"""
     variant = copy.deepcopy(line_model)
@@ -4,6 +4,7 @@ import pathlib
 
 import pytest
 
+import magpie.models.xml.xml_model
 from magpie.models.xml import XmlModel
 
 from .util import assert_diff
@@ -27,6 +28,65 @@ def test_dump(xml_model, file_contents):
     dump = xml_model.dump()
     assert dump == file_contents
 
+def test_clone(xml_model):
+    """Edits on a clone should not affect the original model"""
+    dump = xml_model.dump()
+    variant = xml_model.clone()
+    assert variant.do_delete(('Triangle.java.xml', 'expr_stmt', 0))
+    assert xml_model.dump() == dump
+    assert variant.dump() != dump
+
+def test_indents(xml_model):
+    """Precomputed indentations should match the source"""
+    assert xml_model.find_indent(xml_model.locations['expr_stmt'][0]) == ' '*8
+    assert xml_model.find_indent(xml_model.locations['expr_stmt'][1]) == ' '*12
+    for node, element in enumerate(xml_model.nodes[1:], start=1):
+        assert xml_model.find_indent(node) == xml_model.child_indent(xml_model.parents[node], element)
+
+def test_indents_after_replacement(tmp_path):
+    """Replacing a node by one of another tag should update the indentation of its siblings"""
+    xml = ('<unit><block>{\n    <a>x;</a> <b>if {\n        y;\n    }</b>\n}</block>'
+           '<b>if {\n    z;\n}</b></unit>')
+    (tmp_path / 'foo.xml').write_text(xml)
+    model = XmlModel('foo.xml')
+    with contextlib.chdir(tmp_path):
+        model.init_contents()
+    variant = model.clone()
+    assert variant.do_replace(model, ('foo.xml', 'a', 0), ('foo.xml', 'b', 1))
+
+    # baseline: the same tree, freshly parsed (the original <b> is now the second one)
+    (tmp_path / 'bar.xml').write_text(XmlModel.tree_to_string(variant.contents))
+    baseline = XmlModel('bar.xml')
+    with contextlib.chdir(tmp_path):
+        baseline.init_contents()
+    assert variant.dump() == baseline.dump()
+
+    assert variant.do_replace(model, ('foo.xml', 'b', 0), ('foo.xml', 'b', 1))
+    assert baseline.do_replace(model, ('bar.xml', 'b', 1), ('foo.xml', 'b', 1))
+    assert variant.dump() == baseline.dump()
+    assert variant.dump() == '{\n    if {\n        z;\n    } if {\n     z;\n }\n}if {\n    z;\n}'
+
+    # same for insertions
+    variant = model.clone()
+    assert variant.do_insert(model, ('foo.xml', '_inter_block', 0), ('foo.xml', 'b', 1))
+    for node, element in enumerate(variant.nodes[1:], start=1):
+        assert variant.find_indent(node) == variant.child_indent(variant.parents[node], element)
+
+def test_incremental_dump(monkeypatch, file_contents):
+    """Dumps should only be partially recomputed after edits"""
+    monkeypatch.setattr(magpie.models.xml.xml_model, '_DUMP_CHUNK_SIZE', 8)
+    model = XmlModel('Triangle.java.xml')
+    with contextlib.chdir(pathlib.Path('tests') / 'examples'):
+        model.init_contents()
+    assert model.dump() == file_contents
+    variant = model.clone()
+    assert variant.do_insert(model, ('Triangle.java.xml', '_inter_block', 10), ('Triangle.java.xml', 'expr_stmt', 1))
+    assert variant.do_delete(('Triangle.java.xml', 'expr_stmt', 3))
+    assert len(variant.texts) < len(model.texts)
+    assert variant.dump() == XmlModel.strip_xml_from_tree(variant.contents)
+    assert len(variant.texts) == len(model.texts)
+    assert model.dump() == file_contents
+
 def test_deletion1(xml_model):
     """Deletion should work"""
     variant = copy.deepcopy(xml_model)
@@ -216,6 +276,80 @@ def test_insertion3(xml_model):
 """
     assert_diff(xml_model.dump(), variant.dump(), expected)
 
+def test_replacethendeleteinside(xml_model):
+    """Locations inside a replaced node should no longer be usable"""
+    variant = copy.deepcopy(xml_model)
+    target1 = ('Triangle.java.xml', 'block', 3)
+    target2 = ('Triangle.java.xml', 'block', 4)
+    target3 = ('Triangle.java.xml', 'expr_stmt', 1)
+    target4 = ('Triangle.java.xml', 'expr_stmt', 3)
+    assert variant.do_replace(xml_model, target1, target2)
+    assert not variant.do_delete(target3)
+    assert variant.do_delete(target4)
+
+def test_insertionthendelete(xml_model):
+    """Locations should still target the same nodes after insertions"""
+    variant = copy.deepcopy(xml_model)
+    target1 = ('Triangle.java.xml', '_inter_block', 10)
+    target2 = ('Triangle.java.xml', 'if', 0)
+    target3 = ('Triangle.java.xml', 'expr_stmt', 0)
+    assert variant.do_insert(xml_model, target1, target2)
+    assert variant.do_delete(target3)
+    expected = """--- 
++++ 
+@@ -6,7 +6,12 @@
+ 
+     public static TriangleType classifyTriangle(int a, int b, int c) {
+ 
+-        delay();
++        
++        if (a > b) {
++            int tmp = a;
++            a = b;
++            b = tmp;
++        }
+ 
+         // Sort the sides so that a <= b <= c
+         if (a > b) {
+"""
+    assert_diff(xml_model.dump(), variant.dump(), expected)
+
+def test_replacementthendelete_locations(xml_model):
+    """Locations should refer to the nodes of the original software, whatever the previous edits of the patch"""
+    variant = copy.deepcopy(xml_model)
+    target1 = ('Triangle.java.xml', 'expr_stmt', 0)
+    target2 = ('Triangle.java.xml', 'if', 1)
+    target3 = ('Triangle.java.xml', 'if', 0)
+    target4 = ('Triangle.java.xml', 'expr_stmt', 1)
+    assert variant.do_replace(xml_model, target1, target2)
+    assert variant.do_delete(target3) # still "if (a > b)", not the new first <if>
+    assert not variant.do_delete(target4) # inside "if (a > b)", already deleted
+    expected = """--- 
++++ 
+@@ -6,14 +6,14 @@
+ 
+     public static TriangleType classifyTriangle(int a, int b, int c) {
+ 
+-        delay();
++        if (a > c) {
++            int tmp = a;
++            a = c;
++            c = tmp;
++        }
+ 
+         // Sort the sides so that a <= b <= c
+-        if (a > b) {
+-            int tmp = a;
+-            a = b;
+-            b = tmp;
+-        }
++        
+ 
+         if (a > c) {
+             int tmp = a;
+"""
+    assert_diff(xml_model.dump(), variant.dump(), expected)
+
 @pytest.mark.parametrize(('xml', 'output'), [
     ("""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <unit xmlns="http://www.srcML.org/srcML/src" xmlns:cpp="http://www.srcML.org/srcML/cpp" revision="1.0.0" language="C" filename="rotate.c"><cpp:include>#<cpp:directive>include</cpp:directive> <cpp:file>"rotate.h"</cpp:file></cpp:include>